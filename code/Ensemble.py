@@ -0,0 +1,415 @@
+"""Ensemble Module for Agent-Based Media Effects Simulation.
+
+This module implements a lock-step engine that advances many independent
+replicates of the model at once. Where ``sim.sim`` runs one platform and
+pays the Python interpreter overhead on every time step of every
+replicate, the ensemble keeps the state of R replicates in stacked NumPy
+arrays and executes each time step (media posts, user sampling, screen,
+opinion update, post, rewiring) as batched array operations across all
+replicates. Replicates may differ in their share s, number of media N and
+tolerance eta, so a whole parameter grid can be run together.
+
+The dynamics are the same as in ``sim.sim``; only the way random numbers
+are drawn differs, so single runs are not reproduced draw-for-draw but the
+ensemble has the same distribution. Each replicate draws from its own
+stream (a child of ``SeedSequence.spawn``) a fixed number of uniforms per
+time step, so a replicate's trajectory only depends on its seed, not on
+which or how many other replicates it is run with.
+
+Classes:
+    Ensemble: Stacked state and lock-step dynamics of R replicates
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import itertools
+import numpy as np, pandas as pd
+from SocialMedia import SocialMedia
+from Media import MassMedia
+from RandomPool import RandomPool
+
+class Ensemble():
+    """R replicates of the model advanced in lock-step.
+
+    Users are 0..n-1 and media k of a replicate is n + k (see ``ids``).
+    Followees and media subscriptions share one (R x n x n+M) boolean
+    follow tensor, where M is the largest number of media in the ensemble;
+    replicates with fewer media leave the extra media columns unused. Each
+    replicate's messages are kept in growable (R x capacity) columns, and
+    the positions of the last ``SCREEN`` messages of every poster in a
+    ring buffer, from which screens are assembled.
+
+    Attributes:
+        R (int): Number of replicates
+        n (int): Number of users per replicate
+        M (int): Largest number of media systems
+        params (pd.DataFrame): s, N and eta of each replicate
+        O (np.ndarray): (R x n) current opinions
+        l (np.ndarray): (R x n) base screen sizes
+        follow (np.ndarray): (R x n x n+M) followees and subscriptions
+        size (np.ndarray): Number of messages of each replicate
+        seeds (list): np.random.SeedSequence of each replicate
+        t (int): Number of time steps simulated
+        snapshots (list): Recorded (t, opinions) pairs
+    """
+    SCREEN = 11  # Largest screen size: base size up to 9 plus up to 2
+    RECOMMEND = 21  # Recent messages considered by friend recommendation
+    BLOCK = 64  # Time steps of uniforms drawn at once
+    # Uniforms used by each replicate at every time step, followed by
+    # N uniforms for media activity and N for media content noise
+    (U_UID, U_SIZE, U_NOISE, U_POST, U_REPOST, U_REWIRE, U_FOE,
+     U_FRIEND_REPOST, U_FRIEND_RECOMMEND, U_FRIEND_RANDOM, U_FALLBACK) = range(11)
+    U_MEDIA = 11
+
+    def __init__(self, s, N, eta, R = 1,
+                 p = .5,
+                 mix = False,
+                 include_media = True,
+                 n = 100, m = 400,
+                 miu = .3,
+                 prob_rewire = .3,
+                 rand = .2,
+                 d = .25,
+                 capacity = 1024,
+                 seed = None):
+        """Initialize R replicates with the same initial conditions as ``sim.sim``.
+
+        Args:
+            s (float or array): Audience share, one value or one per replicate
+            N (int or array): Number of media systems, one value or one per replicate
+            eta (float or array): Tolerance threshold, one value or one per replicate
+            R (int, optional): Number of replicates. Defaults to 1.
+            p (float, optional): Media activity probability. Defaults to 0.5.
+            mix (bool, optional): Allow cross-cutting exposure. Defaults to False.
+            include_media (bool, optional): Include mass media. Defaults to True.
+            n (int, optional): Number of users. Defaults to 100.
+            m (int, optional): Number of edges in the initial network. Defaults to 400.
+            miu (float, optional): Strength of social influence. Defaults to 0.3.
+            prob_rewire (float, optional): Probability of rewiring. Defaults to 0.3.
+            rand (float, optional): Noise level in opinion updates. Defaults to 0.2.
+            d (float, optional): Noise level of media content. Defaults to 0.25.
+            capacity (int, optional): Initial message slots per replicate.
+                                      Defaults to 1024.
+            seed (int, SeedSequence or list, optional): Base seed whose R spawned
+                                      children seed the replicates, or a list of R
+                                      per-replicate seeds. Defaults to fresh entropy.
+        """
+        self.R, self.n = R, n
+        self.s = np.broadcast_to(np.asarray(s, dtype=np.float64), (R,)).copy()
+        self.N = np.broadcast_to(np.asarray(N, dtype=np.int64), (R,)).copy()
+        self.eta = np.broadcast_to(np.asarray(eta, dtype=np.float64), (R,)).copy()
+        self.params = pd.DataFrame({"s": self.s, "N": self.N, "eta": self.eta})
+        self.p, self.mix, self.include_media = p, mix, include_media
+        self.miu, self.prob_rewire, self.rand, self.d = miu, prob_rewire, rand, d
+        self.M = M = int(self.N.max())
+        P = n + M
+
+        # One independent random stream per replicate
+        if isinstance(seed, (list, tuple)):
+            self.seeds = [x if isinstance(x, np.random.SeedSequence) else np.random.SeedSequence(x)
+                          for x in seed]
+        else:
+            root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            self.seeds = root.spawn(R)
+        self._rngs = [RandomPool(ss) for ss in self.seeds]
+
+        # Initial state of each replicate, drawn as in sim.sim
+        self.O = np.empty((R, n))
+        self.l = np.empty((R, n), dtype=np.int64)
+        self.follow = np.zeros((R, n, P), dtype=bool)
+        self.aud_sum = np.zeros((R, M))
+        self.aud_count = np.zeros((R, M))
+        for r, rng in enumerate(self._rngs):
+            sm = SocialMedia(n=n, m=m, rng=rng)
+            self.O[r], self.l[r] = sm.O, sm.l
+            edges = sm.G.edges()
+            self.follow[r, edges[:, 0], edges[:, 1]] = True
+            if self.N[r] > 0:
+                md = MassMedia(p, self.s[r], self.N[r], agents=n, O=self.O[r], rng=rng)
+                for mid in md.mids:
+                    self.follow[r, list(md.subs[mid]), mid] = True
+                self.aud_sum[r, :self.N[r]] = md._aud_sum
+                self.aud_count[r, :self.N[r]] = md._aud_count
+
+        # Valid follow targets of each type; unused media columns are never valid
+        self.media_valid = np.arange(M) < self.N[:, None]
+        self.agent_cols = np.zeros((R, P), dtype=bool)
+        self.agent_cols[:, :n] = True
+        self.media_cols = np.zeros((R, P), dtype=bool)
+        self.media_cols[:, n:] = self.media_valid
+
+        # Message columns and per-poster ring buffer of recent positions
+        self.size = np.zeros(R, dtype=np.int64)
+        self.original_poster = np.empty((R, capacity), dtype=np.int32)
+        self.rt_poster = np.empty((R, capacity), dtype=np.int32)
+        self.content = np.empty((R, capacity), dtype=np.float64)
+        self.rt_status = np.empty((R, capacity), dtype=bool)
+        self.ring = np.full((R, P, self.SCREEN), -1, dtype=np.int64)
+        self.head = np.zeros((R, P), dtype=np.int64)
+
+        self._uniforms = np.empty((self.BLOCK, R, self.U_MEDIA + 2 * M))
+        self.t = 0
+        self.snapshots = []
+
+    @classmethod
+    def grid(cls, s_values, N_values, eta_values, R = 1, **kwargs):
+        """Build an ensemble with R replicates of every (s, N, eta) combination.
+
+        Args:
+            s_values (list): Audience shares
+            N_values (list): Numbers of media systems
+            eta_values (list): Tolerance thresholds
+            R (int, optional): Replicates per combination. Defaults to 1.
+            **kwargs: Other parameters of ``Ensemble``
+
+        Returns:
+            Ensemble: Ensemble of len(s_values) * len(N_values) * len(eta_values) * R
+                      replicates, ordered as in ``params``
+        """
+        combos = list(itertools.product(s_values, N_values, eta_values))
+        s, N, eta = (np.repeat([c[i] for c in combos], R) for i in range(3))
+        return cls(s, N, eta, R=len(s), **kwargs)
+
+    @staticmethod
+    def _pick(mask, u):
+        """Column of one uniformly chosen True entry per row (0 if none).
+
+        Args:
+            mask (np.ndarray): (k x c) boolean candidates
+            u (np.ndarray): One uniform in [0, 1) per row
+
+        Returns:
+            np.ndarray: Chosen column of each row
+        """
+        target = (u * mask.sum(axis=1)).astype(np.int64)
+        return (np.cumsum(mask, axis=1) > target[:, None]).argmax(axis=1)
+
+    def _draw(self):
+        """Uniforms of the current time step, refilling the block when used up.
+
+        Replicate r draws BLOCK x (11 + 2 N_r) uniforms from its own stream at
+        each refill, so its stream does not depend on the other replicates.
+
+        Returns:
+            np.ndarray: (R x 11+2M) uniforms
+        """
+        i = self.t % self.BLOCK
+        if i == 0:
+            for r, rng in enumerate(self._rngs):
+                k = self.U_MEDIA + 2 * self.N[r]
+                self._uniforms[:, r, :k] = rng.random(self.BLOCK * k).reshape(self.BLOCK, k)
+        return self._uniforms[i]
+
+    def _grow(self, k):
+        """Make room for k more messages in every replicate."""
+        capacity = self.content.shape[1]
+        if self.size.max() + k > capacity:
+            capacity = max(2 * capacity, int(self.size.max()) + k)
+            for name in ["original_poster", "rt_poster", "content", "rt_status"]:
+                old = getattr(self, name)
+                new = np.empty((self.R, capacity), dtype=old.dtype)
+                new[:, :old.shape[1]] = old
+                setattr(self, name, new)
+
+    def _append(self, rows, original_poster, rt_poster, content, rt_status, rank = 0):
+        """Append messages; rank orders several messages of one replicate."""
+        pos = self.size[rows] + rank
+        self.original_poster[rows, pos] = original_poster
+        self.rt_poster[rows, pos] = rt_poster
+        self.content[rows, pos] = content
+        self.rt_status[rows, pos] = rt_status
+        slot = self.head[rows, rt_poster] % self.SCREEN
+        self.ring[rows, rt_poster, slot] = pos
+        self.head[rows, rt_poster] += 1
+        self.size += np.bincount(rows, minlength=self.R)
+
+    def step(self):
+        """Advance every replicate by one time step."""
+        R, n, M = self.R, self.n, self.M
+        self._grow(M + 1)
+        U = self._draw()
+
+        # Mass media post the mean opinion of their audience plus noise
+        if self.include_media and M > 0:
+            media = self.U_MEDIA + np.arange(M)
+            active = (U[:, media] < self.p) & self.media_valid
+            noise = np.take_along_axis(U, np.minimum(media + self.N[:, None], U.shape[1] - 1), axis=1)
+            noise = self.d * (noise * 2 - 1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                v = self.aud_sum / self.aud_count + noise
+            rows, k = np.nonzero(active)
+            rank = (np.cumsum(active, axis=1) - 1)[rows, k]
+            self._append(rows, n + k, n + k, v[rows, k], False, rank)
+
+        # Sample one user per replicate; a screen size of 0 means inactive
+        uid = (U[:, self.U_UID] * n).astype(np.int64)
+        l = self.l[np.arange(R), uid] + (U[:, self.U_SIZE] * 5).astype(np.int64) - 2
+        a = np.flatnonzero(l > 0)
+        u, l, U = uid[a], l[a], U[a]
+        k = len(a)
+        if k > 0:
+            # Screen: the l most recent messages of the followees/subscriptions
+            cols = self.follow[a, u]
+            if not self.include_media:
+                cols[:, n:] = False
+            i, j = np.nonzero(cols)
+            pos = self.ring[a[i], j].ravel()
+            row = np.repeat(i, self.SCREEN)
+            row, pos = row[pos >= 0], pos[pos >= 0]
+            order = np.lexsort((-pos, row))
+            row, pos = row[order], pos[order]
+            rank = np.arange(len(row)) - np.searchsorted(row, np.arange(k))[row]
+            shown = rank < l[row]
+            screen = np.zeros((k, self.SCREEN), dtype=np.int64)
+            valid = np.zeros((k, self.SCREEN), dtype=bool)
+            screen[row[shown], rank[shown]] = pos[shown]
+            valid[row[shown], rank[shown]] = True
+
+            # Friendly/hostile messages and social influence
+            o = self.O[a, u]
+            diff = self.content[a[:, None], screen] - o[:, None]
+            close = valid & (np.abs(diff) < self.eta[a, None])
+            foe = valid & ~close
+            n_close = close.sum(axis=1)
+            influenced = n_close > 0
+            influence = self.miu * np.where(close, diff, 0).sum(axis=1) / np.maximum(n_close, 1)
+            noise = (U[:, self.U_NOISE] * 2 - 1) * self.rand
+            new_o = o + influence + noise
+
+            # Repost a friendly message or post the current opinion
+            draw = U[:, self.U_POST]
+            repost = (draw < .5) & influenced
+            original = draw >= .5
+            rt = screen[np.arange(k), self._pick(close, U[:, self.U_REPOST])]
+            posters = np.where(repost, self.original_poster[a, rt], u)
+            contents = np.where(repost, self.content[a, rt], o)
+            post = repost | original
+            self._append(a[post], posters[post], u[post], contents[post], repost[post])
+
+            # Update opinions and the audience sums of the users' media
+            update = influenced & (new_o != 0)
+            self.O[a[update], u[update]] = new_o[update]
+            delta = self.O[a, u] - o
+            self.aud_sum[a] += delta[:, None] * self.follow[a, u, n:]
+
+            # Rewire with probability prob_rewire when the screen had hostile messages
+            rewire = (U[:, self.U_REWIRE] < self.prob_rewire) & foe.any(axis=1)
+            b = np.flatnonzero(rewire)
+            if len(b) > 0:
+                self._rewire(a[b], u[b], o[b], screen[b], close[b], foe[b], U[b])
+        self.t += 1
+
+    def _rewire(self, rows, u, o, screen, close, foe, U):
+        """Unfollow the source of a hostile message and follow a new one."""
+        n, k = self.n, len(rows)
+        idx = np.arange(k)
+
+        # Followees, subscriptions and self, before unfollowing
+        exclude = self.follow[rows, u].copy()
+        exclude[idx, u] = True
+
+        # Unfollow the (re)poster of a random hostile message
+        target = self.rt_poster[rows, screen[idx, self._pick(foe, U[:, self.U_FOE])]].astype(np.int64)
+        media = target >= n
+        self.follow[rows, u, target] = False
+        self.aud_sum[rows[media], target[media] - n] -= self.O[rows[media], u[media]]
+        self.aud_count[rows[media], target[media] - n] -= 1
+        # Drop the rounding remainder so an empty audience averages to nan
+        self.aud_sum[self.aud_count == 0] = 0.
+
+        # Follow a new source of the same type (any type when mixing)
+        if self.mix:
+            allowed = self.agent_cols[rows] | self.media_cols[rows]
+        else:
+            allowed = np.where(media[:, None], self.media_cols[rows], self.agent_cols[rows])
+        allowed &= ~exclude
+
+        # 1. Original posters of friendly messages
+        candidates = np.zeros_like(allowed)
+        i, j = np.nonzero(close)
+        candidates[i, self.original_poster[rows[i], screen[i, j]]] = True
+        candidates &= allowed
+        new = np.where(candidates.any(axis=1), self._pick(candidates, U[:, self.U_FRIEND_REPOST]), -1)
+
+        # 2. Posters of recent friendly messages
+        todo = np.flatnonzero(new < 0)
+        if len(todo) > 0:
+            new[todo] = self._recommend(rows[todo], o[todo], exclude[todo], allowed[todo],
+                                        U[todo, self.U_FRIEND_RECOMMEND])
+
+        # 3. Any allowed target, or any media system if none is left
+        todo = np.flatnonzero(new < 0)
+        if len(todo) > 0:
+            new[todo] = np.where(allowed[todo].any(axis=1),
+                                 self._pick(allowed[todo], U[todo, self.U_FRIEND_RANDOM]), -1)
+            if not self.mix:
+                fallback = todo[(new[todo] < 0) & media[todo]]
+                new[fallback] = self._pick(self.media_cols[rows[fallback]], U[fallback, self.U_FALLBACK])
+
+        # Follow it (subscribing twice has no effect)
+        ok = (new >= 0) & ~self.follow[rows, u, np.maximum(new, 0)]
+        rows, u, new = rows[ok], u[ok], new[ok]
+        self.follow[rows, u, new] = True
+        media = new >= n
+        self.aud_sum[rows[media], new[media] - n] += self.O[rows[media], u[media]]
+        self.aud_count[rows[media], new[media] - n] += 1
+
+    def _recommend(self, rows, o, exclude, allowed, u):
+        """Posters of friendly messages among the recent messages of non-followees.
+
+        Looks at the ``RECOMMEND`` most recent messages whose (re)poster is
+        not excluded, widening the window back in time until enough are found.
+
+        Returns:
+            np.ndarray: Chosen poster of each row, or -1 if none qualifies
+        """
+        new = np.full(len(rows), -1)
+        todo = np.arange(len(rows))
+        window = 4 * self.RECOMMEND
+        while len(todo) > 0:
+            r = rows[todo]
+            pos = self.size[r, None] - window + np.arange(window)
+            inside = pos >= 0
+            pos = np.maximum(pos, 0)
+            posters = self.rt_poster[r[:, None], pos]
+            kept = inside & ~exclude[todo[:, None], posters]
+            later = np.cumsum(kept[:, ::-1], axis=1)[:, ::-1]
+            kept &= later <= self.RECOMMEND
+            done = (later[:, 0] >= self.RECOMMEND) | (self.size[r] <= window)
+
+            friendly = kept & (np.abs(self.content[r[:, None], pos] - o[todo, None]) < self.eta[r, None])
+            friendly &= allowed[todo[:, None], posters]
+            found = done & friendly.any(axis=1)
+            j = self._pick(friendly, u[todo])
+            new[todo[found]] = posters[found, j[found]]
+            todo = todo[~done]
+            window *= 2
+        return new
+
+    def run(self, T = 10000, record_every = None):
+        """Advance the ensemble by T time steps.
+
+        Args:
+            T (int, optional): Number of time steps. Defaults to 10000.
+            record_every (int, optional): Keep a copy of all opinions every
+                                          record_every steps. Defaults to None.
+
+        Returns:
+            Ensemble: self
+        """
+        for _ in range(T):
+            self.step()
+            if record_every and self.t % record_every == 0:
+                self.snapshots.append((self.t, self.O.copy()))
+        return self
+
+    def opinions(self):
+        """Current opinions of all replicates as a tall table.
+
+        Returns:
+            pd.DataFrame: Columns 'replicate', 's', 'N', 'eta', 'uid', 'value'
+        """
+        df = self.params.loc[np.repeat(np.arange(self.R), self.n)].reset_index(names="replicate")
+        df["uid"] = np.tile(np.arange(self.n), self.R)
+        df["value"] = self.O.ravel()
+        return df
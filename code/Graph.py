@@ -0,0 +1,163 @@
+"""Graph Module for Agent-Based Media Effects Simulation.
+
+This module implements a compact directed graph for the follow network of
+the social media platform. Each user's followees are kept in a growable
+int32 array, so the network costs a few bytes per edge instead of the
+nested dictionaries of networkx, and the graph can be converted to
+networkx when it is needed for analysis.
+
+Classes:
+    ArrayDiGraph: Directed graph on users 0..n-1 backed by adjacency arrays
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import networkx as nx, numpy as np
+
+class ArrayDiGraph():
+    """Directed graph on a fixed set of nodes 0..n-1 backed by int32 arrays.
+
+    Offers the part of the ``networkx.DiGraph`` interface used by the
+    simulation (``successors``, ``has_edge``, ``add_edge``, ``remove_edge``,
+    ``edges``). Successors keep their insertion order, as in networkx.
+    Out-degrees are small, so an edge is located by a vectorized scan of
+    the source's array rather than through a per-edge hash map.
+
+    Attributes:
+        n (int): Number of nodes
+    """
+    def __init__(self, n, capacity = 4):
+        """Initialize a graph with n nodes and no edges.
+
+        Args:
+            n (int): Number of nodes
+            capacity (int, optional): Initial successor slots per node.
+                                      Defaults to 4.
+        """
+        self.n = n
+        self._succ = [np.empty(capacity, dtype=np.int32) for _ in range(n)]
+        self._deg = np.zeros(n, dtype=np.int64)
+        self._m = 0
+
+    @classmethod
+    def from_edges(cls, n, edges):
+        """Build a graph from a list or array of distinct (source, target) edges.
+
+        Args:
+            n (int): Number of nodes
+            edges (iterable): Directed edges (source, target)
+
+        Returns:
+            ArrayDiGraph: Graph holding the edges
+        """
+        edges = np.asarray(edges if isinstance(edges, np.ndarray) else list(edges),
+                           dtype=np.int32).reshape(-1, 2)
+        order = np.argsort(edges[:, 0], kind="stable")
+        G = cls(0)
+        G.n = n
+        G._deg = np.bincount(edges[:, 0], minlength=n).astype(np.int64)
+        G._succ = np.split(edges[order, 1], np.cumsum(G._deg)[:-1])
+        G._m = len(edges)
+        return G
+
+    @classmethod
+    def from_networkx(cls, G, n = None):
+        """Convert a networkx graph with integer nodes.
+
+        Args:
+            G (networkx.DiGraph): Graph to convert
+            n (int, optional): Number of nodes. Defaults to the largest node + 1.
+
+        Returns:
+            ArrayDiGraph: Graph holding the same edges
+        """
+        if n is None:
+            n = max(G.nodes, default=-1) + 1
+        return cls.from_edges(n, G.edges())
+
+    def to_networkx(self):
+        """Convert to a networkx graph for analysis.
+
+        Returns:
+            networkx.DiGraph: Graph with nodes 0..n-1 and the same edges
+        """
+        G = nx.DiGraph()
+        G.add_nodes_from(range(self.n))
+        G.add_edges_from(self.edges().tolist())
+        return G
+
+    def __len__(self):
+        return self.n
+
+    def number_of_nodes(self):
+        return self.n
+
+    def number_of_edges(self):
+        return self._m
+
+    def out_degree(self, u):
+        return int(self._deg[u])
+
+    def successors(self, u):
+        """Nodes that u points to, in insertion order.
+
+        Args:
+            u (int): Source node
+
+        Returns:
+            list: Target nodes
+        """
+        return self._succ[u][:self._deg[u]].tolist()
+
+    def has_edge(self, u, v):
+        return bool((self._succ[u][:self._deg[u]] == v).any())
+
+    def add_edge(self, u, v):
+        """Add the edge u -> v (no-op if it already exists).
+
+        Args:
+            u (int): Source node
+            v (int): Target node
+        """
+        if self.has_edge(u, v):
+            return
+        d = self._deg[u]
+        succ = self._succ[u]
+        if d == len(succ):
+            grown = np.empty(max(2 * len(succ), 4), dtype=np.int32)
+            grown[:d] = succ[:d]
+            self._succ[u] = succ = grown
+        succ[d] = v
+        self._deg[u] = d + 1
+        self._m += 1
+
+    def remove_edge(self, u, v):
+        """Remove the edge u -> v.
+
+        Args:
+            u (int): Source node
+            v (int): Target node
+
+        Raises:
+            networkx.NetworkXError: If the edge is not in the graph
+        """
+        d = self._deg[u]
+        succ = self._succ[u]
+        pos = np.flatnonzero(succ[:d] == v)
+        if len(pos) == 0:
+            raise nx.NetworkXError(f"The edge {u}-{v} not in graph.")
+        p = pos[0]
+        succ[p:d - 1] = succ[p + 1:d]
+        self._deg[u] = d - 1
+        self._m -= 1
+
+    def edges(self):
+        """All edges, grouped by source node.
+
+        Returns:
+            np.ndarray: (m x 2) int32 array of (source, target) rows
+        """
+        sources = np.repeat(np.arange(self.n, dtype=np.int32), self._deg)
+        targets = np.concatenate([succ[:d] for succ, d in zip(self._succ, self._deg.tolist())]
+                                 + [np.empty(0, dtype=np.int32)])
+        return np.column_stack([sources, targets])
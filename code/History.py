@@ -0,0 +1,702 @@
+"""History Module for Agent-Based Media Effects Simulation.
+
+This module implements compact, event-based records of how the simulation
+state evolves over time. Instead of storing a full copy of the state at
+every time step, each history keeps the initial state, an append-only log
+of changes and occasional dense keyframes, from which the state at any time
+step can be reconstructed on demand.
+
+Classes:
+    EventLog: Growable typed columns shared by the histories
+    OpinionHistory: Opinion change log with dense keyframes
+    NetworkHistory: Edge event log with full-snapshot keyframes
+    SubscriptionHistory: Subscribe/cancel event log with snapshot keyframes
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import re
+import json as js
+import networkx as nx, numpy as np, pandas as pd
+import pyarrow.parquet as pq
+
+class EventLog():
+    """Append-only table of typed NumPy columns with amortized doubling.
+
+    Attributes:
+        size (int): Number of stored events
+    """
+    def __init__(self, dtypes, capacity = 1024):
+        """Initialize an empty event log.
+
+        Args:
+            dtypes (dict): Column name -> NumPy dtype
+            capacity (int, optional): Initial number of preallocated rows.
+                                      Defaults to 1024.
+        """
+        self.size = 0
+        self._columns = {k: np.empty(capacity, dtype=v) for k, v in dtypes.items()}
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # Pickle the stored events only, not the spare capacity
+        state = self.__dict__.copy()
+        state["_columns"] = {name: column[:self.size] for name, column in self._columns.items()}
+        return state
+
+    def __getitem__(self, name):
+        return self._columns[name][:self.size]
+
+    def _reserve(self, k):
+        """Make room for k more events, doubling the capacity as needed."""
+        capacity = len(next(iter(self._columns.values())))
+        if self.size + k > capacity:
+            capacity = max(2 * capacity, self.size + k, 1)
+            for name, old in self._columns.items():
+                new = np.empty(capacity, dtype=old.dtype)
+                new[:self.size] = old[:self.size]
+                self._columns[name] = new
+
+    def append(self, *values):
+        """Append one event; values follow the column order of ``dtypes``."""
+        self._reserve(1)
+        for column, value in zip(self._columns.values(), values):
+            column[self.size] = value
+        self.size += 1
+
+    def extend(self, k, *values):
+        """Append k events at once.
+
+        Args:
+            k (int): Number of events
+            *values: One array of length k (or a scalar shared by all k
+                     events) per column, in the column order of ``dtypes``
+        """
+        self._reserve(k)
+        for column, value in zip(self._columns.values(), values):
+            column[self.size:self.size + k] = value
+        self.size += k
+
+    def to_frame(self):
+        """Copy the stored events into a DataFrame with one column per field."""
+        return pd.DataFrame({name: self[name].copy() for name in self._columns})
+
+class OpinionHistory():
+    """Opinion evolution stored as (t, uid, new value) change events.
+
+    The opinion vector after time step t can be materialized from the
+    nearest keyframe at or before t plus the changes recorded since.
+
+    Attributes:
+        n (int): Number of users
+        T (int): Last recorded time step
+        keyframe_every (int): Time steps between dense keyframes
+        events (EventLog): Opinion changes with columns 't', 'uid', 'value'
+        keyframes (dict): Time step -> dense opinion vector
+    """
+    def __init__(self, O, keyframe_every = 1000):
+        """Initialize the history with the opinions at time 0.
+
+        Args:
+            O (np.ndarray): Initial opinions of all users
+            keyframe_every (int, optional): Time steps between dense keyframes.
+                                            Defaults to 1000.
+        """
+        self.n = len(O)
+        self.T = 0
+        self.keyframe_every = keyframe_every
+        self.events = EventLog({"t": np.int64, "uid": np.int32, "value": np.float64})
+        self._current = np.array(O, dtype=np.float64)
+        self.keyframes = {0: self._current.copy()}
+        self._last_keyframe = 0
+
+    def record(self, t, uid = None, value = None):
+        """Record the state at time step t.
+
+        Args:
+            t (int): Time step
+            uid (int, optional): User whose opinion changed, if any
+            value (float, optional): The user's new opinion
+        """
+        t = int(t)
+        if uid is not None:
+            self.events.append(t, uid, value)
+            self._current[uid] = value
+        self.T = max(self.T, t)
+        if t - self._last_keyframe >= self.keyframe_every:
+            self.keyframes[t] = self._current.copy()
+            self._last_keyframe = t
+
+    def latest(self):
+        """Opinions after the last recorded time step.
+
+        Returns:
+            np.ndarray: Live opinion vector (do not modify)
+        """
+        return self._current
+
+    def at(self, t):
+        """Materialize the opinion vector after time step t.
+
+        Args:
+            t (int): Time step
+
+        Returns:
+            np.ndarray: Opinions of all users at time t
+        """
+        start = max(k for k in self.keyframes if k <= t)
+        O = self.keyframes[start].copy()
+        times = self.events["t"]
+        lo, hi = np.searchsorted(times, [start, t], side="right")
+        O[self.events["uid"][lo:hi]] = self.events["value"][lo:hi]
+        return O
+
+    def matrix(self, start = 0, stop = None, dtype = np.float32):
+        """Materialize a dense (time x agent) opinion matrix.
+
+        Args:
+            start (int, optional): First time step. Defaults to 0.
+            stop (int, optional): End time step (exclusive). Defaults to T + 1.
+            dtype (np.dtype, optional): Output dtype. Defaults to np.float32.
+
+        Returns:
+            np.ndarray: Array of shape (stop - start, n)
+        """
+        stop = self.T + 1 if stop is None else stop
+        times = self.events["t"]
+        lo, hi = np.searchsorted(times, [start, stop - 1], side="right")
+        rows = times[lo:hi] - start
+        uids = self.events["uid"][lo:hi]
+        M = np.empty((stop - start, self.n), dtype=dtype)
+        M[0] = self.at(start)
+        M[rows, uids] = self.events["value"][lo:hi]
+        # Forward-fill every agent's column from the row of its last change
+        last = np.zeros(M.shape, dtype=np.int32)
+        last[rows, uids] = rows
+        np.maximum.accumulate(last, axis=0, out=last)
+        return np.take_along_axis(M, last, axis=0)
+
+    def to_frame(self):
+        """Export the history as a tall table.
+
+        The first n rows hold the initial opinions at t = 0, followed by one
+        row per opinion change. The last time step is kept in ``attrs['T']``.
+
+        Returns:
+            pd.DataFrame: Columns 't', 'uid', 'value'
+        """
+        initial = self.keyframes[0]
+        df = pd.DataFrame({
+            "t": np.concatenate([np.zeros(self.n, dtype=np.int64), self.events["t"]]),
+            "uid": np.concatenate([np.arange(self.n, dtype=np.int32), self.events["uid"]]),
+            "value": np.concatenate([initial, self.events["value"]])
+        })
+        df.attrs["T"] = self.T
+        return df
+
+    @classmethod
+    def from_frame(cls, df, keyframe_every = 1000):
+        """Rebuild a history from a stored opinions table.
+
+        Accepts both the tall layout written by ``to_frame`` and the legacy
+        wide layout with one 'Time_t' column per recorded time step.
+
+        Args:
+            df (pd.DataFrame): Stored opinions
+            keyframe_every (int, optional): Time steps between dense keyframes.
+                                            Defaults to 1000.
+
+        Returns:
+            OpinionHistory: Reconstructed history
+        """
+        if list(df.columns) == ["t", "uid", "value"]:
+            initial = df[df.t == 0].sort_values("uid").value.values
+            history = cls(initial, keyframe_every=keyframe_every)
+            changes = df[len(initial):]
+            history.events.extend(len(changes), changes.t.values, changes.uid.values,
+                                  changes.value.values)
+            T = int(max(df.attrs.get("T", 0), changes.t.max() if len(changes) else 0))
+            # Keyframes every keyframe_every steps, each built from the previous one
+            for t in range(keyframe_every, T + 1, keyframe_every):
+                history.keyframes[t] = history.at(t)
+            history._last_keyframe = max(history.keyframes)
+            history._current = history.at(T)
+            history.T = T
+            return history
+        # Legacy wide layout: diff consecutive recorded columns
+        times = [int(re.sub(r"\D", "", str(c))) for c in df.columns]
+        values = df.values
+        history = cls(values[:, 0], keyframe_every=keyframe_every)
+        for j in range(1, values.shape[1]):
+            for uid in np.flatnonzero(values[:, j] != values[:, j - 1]):
+                history.record(times[j], uid, values[uid, j])
+            history.record(times[j])
+        return history
+
+class NetworkHistory():
+    """Follow-network evolution stored as edge add/remove events.
+
+    The edge set after time step t is rebuilt from the nearest keyframe at
+    or before t plus the events recorded since. Like the legacy per-step
+    edge lists, only edges are tracked (isolated nodes are not).
+
+    Attributes:
+        T (int): Last recorded time step
+        keyframe_every (int): Time steps between full edge snapshots
+        events (EventLog): Edge events with columns 't', 'source', 'target',
+                           'op' (+1 add, -1 remove)
+        keyframes (dict): Time step -> (m x 2) edge array
+    """
+    ADD, REMOVE = 1, -1
+
+    def __init__(self, G, keyframe_every = 1000):
+        """Initialize the history with the network at time 0.
+
+        Args:
+            G (ArrayDiGraph or networkx.DiGraph): Initial follow network
+            keyframe_every (int, optional): Time steps between full snapshots.
+                                            Defaults to 1000.
+        """
+        self.T = 0
+        self.keyframe_every = keyframe_every
+        self.events = EventLog({"t": np.int64, "source": np.int32,
+                                "target": np.int32, "op": np.int8})
+        self.keyframes = {0: self._snapshot(G.edges())}
+        self._last_keyframe = 0
+
+    @staticmethod
+    def _snapshot(edges):
+        if not isinstance(edges, np.ndarray):
+            edges = list(edges)
+        return np.array(edges, dtype=np.int32).reshape(-1, 2)
+
+    def record(self, t, G, changes = ()):
+        """Record the edge events of time step t.
+
+        Args:
+            t (int): Time step
+            G (ArrayDiGraph or networkx.DiGraph): Network after time step t
+                                                  (used for keyframes)
+            changes (list, optional): (source, target, op) edge events of the step
+        """
+        t = int(t)
+        for source, target, op in changes:
+            self.events.append(t, source, target, op)
+        self.T = max(self.T, t)
+        if t - self._last_keyframe >= self.keyframe_every:
+            self.keyframes[t] = self._snapshot(G.edges())
+            self._last_keyframe = t
+
+    def _apply(self, edges, lo, hi):
+        """Apply events lo..hi (exclusive) to an edge set in place."""
+        ops = zip(self.events["source"][lo:hi].tolist(),
+                  self.events["target"][lo:hi].tolist(),
+                  self.events["op"][lo:hi].tolist())
+        for source, target, op in ops:
+            if op == self.ADD:
+                edges.add((source, target))
+            else:
+                edges.discard((source, target))
+        return edges
+
+    def edges_at(self, t):
+        """Edge set after time step t.
+
+        Args:
+            t (int): Time step
+
+        Returns:
+            set: Directed edges (source, target)
+        """
+        start = max(k for k in self.keyframes if k <= t)
+        edges = set(map(tuple, self.keyframes[start].tolist()))
+        lo, hi = np.searchsorted(self.events["t"], [start, t], side="right")
+        return self._apply(edges, lo, hi)
+
+    def graph_at(self, t):
+        """Follow network after time step t.
+
+        Args:
+            t (int): Time step
+
+        Returns:
+            networkx.DiGraph: Network built from the edges at time t
+        """
+        G = nx.DiGraph()
+        G.add_edges_from(self.edges_at(t))
+        return G
+
+    def replay(self, start = 0, stop = None):
+        """Iterate over the network state step by step.
+
+        A single graph is updated in place with each step's events, so
+        replaying costs O(events) rather than O(edges) per step. Do not
+        modify the yielded graph.
+
+        Args:
+            start (int, optional): First time step. Defaults to 0.
+            stop (int, optional): End time step (exclusive). Defaults to T + 1.
+
+        Yields:
+            tuple: (t, networkx.DiGraph) for every t in [start, stop)
+        """
+        stop = self.T + 1 if stop is None else stop
+        G = self.graph_at(start)
+        times = self.events["t"]
+        bounds = np.searchsorted(times, np.arange(start, stop), side="right")
+        yield start, G
+        for t, lo, hi in zip(range(start + 1, stop), bounds[:-1], bounds[1:]):
+            ops = zip(self.events["source"][lo:hi].tolist(),
+                      self.events["target"][lo:hi].tolist(),
+                      self.events["op"][lo:hi].tolist())
+            for source, target, op in ops:
+                if op == self.ADD:
+                    G.add_edge(source, target)
+                elif G.has_edge(source, target):
+                    G.remove_edge(source, target)
+                    # Keep the edges-only view: drop nodes left without edges
+                    for node in (source, target):
+                        if G.degree(node) == 0:
+                            G.remove_node(node)
+            yield t, G
+
+    def to_frame(self):
+        """Export the history as a tall table.
+
+        The initial edges are stored as additions at t = 0, followed by one
+        row per edge event. The last time step is kept in ``attrs['T']``.
+
+        Returns:
+            pd.DataFrame: Columns 't', 'source', 'target', 'op'
+        """
+        initial = self.keyframes[0]
+        m = len(initial)
+        df = pd.DataFrame({
+            "t": np.concatenate([np.zeros(m, dtype=np.int64), self.events["t"]]),
+            "source": np.concatenate([initial[:, 0], self.events["source"]]),
+            "target": np.concatenate([initial[:, 1], self.events["target"]]),
+            "op": np.concatenate([np.full(m, self.ADD, dtype=np.int8), self.events["op"]])
+        })
+        df.attrs["T"] = self.T
+        return df
+
+    @classmethod
+    def from_frame(cls, df, keyframe_every = 1000):
+        """Rebuild a history from a table written by ``to_frame``.
+
+        Args:
+            df (pd.DataFrame): Stored edge events
+            keyframe_every (int, optional): Time steps between full snapshots.
+                                            Defaults to 1000.
+
+        Returns:
+            NetworkHistory: Reconstructed history
+        """
+        initial = df[df.t == 0]
+        G = nx.DiGraph()
+        G.add_edges_from(zip(initial.source.tolist(), initial.target.tolist()))
+        history = cls(G, keyframe_every=keyframe_every)
+        events = df[len(initial):]
+        for t, group in events.groupby("t", sort=False):
+            changes = list(zip(group.source.tolist(), group.target.tolist(), group.op.tolist()))
+            for source, target, op in changes:
+                if op == cls.ADD:
+                    G.add_edge(source, target)
+                else:
+                    G.remove_edge(source, target)
+            history.record(t, G, changes)
+        history.record(df.attrs.get("T", history.T), G)
+        return history
+
+    @classmethod
+    def from_json(cls, path, keyframe_every = 1000):
+        """Rebuild a history from a legacy JSON network file.
+
+        Older runs stored the full edge list of every time step as
+        {"Time_t": [[source, target], ...]}; consecutive edge lists are diffed
+        into add/remove events while the file is streamed.
+
+        Args:
+            path (str): Path to the JSON file
+            keyframe_every (int, optional): Time steps between full snapshots.
+                                            Defaults to 1000.
+
+        Returns:
+            NetworkHistory: History holding the same network at every stored time step
+        """
+        steps = iter_json_networks(path)
+        t, edges = next(steps)
+        G = nx.DiGraph()
+        G.add_edges_from(edges)
+        history = cls(G, keyframe_every=keyframe_every)
+        current = set(edges)
+        for t, edges in steps:
+            edges = set(edges)
+            changes = ([(u, v, cls.REMOVE) for u, v in current - edges]
+                       + [(u, v, cls.ADD) for u, v in edges - current])
+            G.remove_edges_from((u, v) for u, v, op in changes if op == cls.REMOVE)
+            G.add_edges_from((u, v) for u, v, op in changes if op == cls.ADD)
+            history.record(t, G, changes)
+            current = edges
+        history.record(t, G)
+        return history
+
+class SubscriptionHistory():
+    """Media subscription evolution stored as subscribe/cancel events.
+
+    The subscriber lists after time step t are rebuilt from the nearest
+    keyframe at or before t plus the events recorded since, preserving the
+    order in which users joined each audience.
+
+    Attributes:
+        mids (list): Media system identifiers
+        T (int): Last recorded time step
+        keyframe_every (int): Time steps between full snapshots
+        events (EventLog): Subscription events with columns 't', 'uid',
+                           'media' (index into mids), 'op' (+1 subscribe,
+                           -1 cancel)
+        keyframes (dict): Time step -> {media_id: [user_ids]}
+    """
+    SUBSCRIBE, CANCEL = 1, -1
+
+    def __init__(self, subs, keyframe_every = 1000):
+        """Initialize the history with the subscriptions at time 0.
+
+        Args:
+            subs (dict): Initial subscribers {media_id: iterable of user_ids}
+            keyframe_every (int, optional): Time steps between full snapshots.
+                                            Defaults to 1000.
+        """
+        self.mids = list(subs)
+        self._media = {mid: i for i, mid in enumerate(self.mids)}
+        self.T = 0
+        self.keyframe_every = keyframe_every
+        self.events = EventLog({"t": np.int64, "uid": np.int32,
+                                "media": np.int16, "op": np.int8})
+        self.keyframes = {0: self._snapshot(subs)}
+        self._last_keyframe = 0
+
+    @staticmethod
+    def _snapshot(subs):
+        return {mid: [int(uid) for uid in uids] for mid, uids in subs.items()}
+
+    def record(self, t, subs, changes = ()):
+        """Record the subscription events of time step t.
+
+        Args:
+            t (int): Time step
+            subs (dict): Subscriptions after time step t (used for keyframes)
+            changes (list, optional): (uid, media_id, op) events of the step
+        """
+        t = int(t)
+        for uid, mid, op in changes:
+            self.events.append(t, uid, self._media[mid], op)
+        self.T = max(self.T, t)
+        if t - self._last_keyframe >= self.keyframe_every:
+            self.keyframes[t] = self._snapshot(subs)
+            self._last_keyframe = t
+
+    def subs_at(self, t):
+        """Subscriber lists after time step t.
+
+        Args:
+            t (int): Time step
+
+        Returns:
+            dict: Subscriber mapping {media_id: [user_ids]}
+        """
+        start = max(k for k in self.keyframes if k <= t)
+        subs = self._snapshot(self.keyframes[start])
+        lo, hi = np.searchsorted(self.events["t"], [start, t], side="right")
+        ops = zip(self.events["uid"][lo:hi].tolist(),
+                  self.events["media"][lo:hi].tolist(),
+                  self.events["op"][lo:hi].tolist())
+        for uid, media, op in ops:
+            if op == self.SUBSCRIBE:
+                subs[self.mids[media]].append(uid)
+            else:
+                subs[self.mids[media]].remove(uid)
+        return subs
+
+    def to_frame(self):
+        """Export the history as a tall table.
+
+        The subscriptions at t = 0 are stored as subscribe events, followed
+        by one row per event. The last time step is kept in ``attrs['T']``.
+
+        Returns:
+            pd.DataFrame: Columns 't', 'uid', 'media', 'op'
+        """
+        initial = [(uid, mid) for mid, uids in self.subs_at(0).items() for uid in uids]
+        k = len(initial)
+        df = pd.DataFrame({
+            "t": np.concatenate([np.zeros(k, dtype=np.int64), self.events["t"]]),
+            "uid": np.concatenate([np.array([u for u, _ in initial], dtype=np.int32), self.events["uid"]]),
+            "media": [mid for _, mid in initial] + [self.mids[i] for i in self.events["media"]],
+            "op": np.concatenate([np.full(k, self.SUBSCRIBE, dtype=np.int8), self.events["op"]])
+        })
+        df.attrs["T"] = self.T
+        df.attrs["mids"] = self.mids
+        return df
+
+    @classmethod
+    def from_frame(cls, df, keyframe_every = 1000):
+        """Rebuild a history from a table written by ``to_frame``.
+
+        Args:
+            df (pd.DataFrame): Stored subscription events
+            keyframe_every (int, optional): Time steps between full snapshots.
+                                            Defaults to 1000.
+
+        Returns:
+            SubscriptionHistory: Reconstructed history
+        """
+        initial = df[df.t == 0]
+        subs = {mid: [] for mid in df.attrs.get("mids", sorted(df.media.unique()))}
+        for uid, mid in zip(initial.uid.tolist(), initial.media.tolist()):
+            subs[mid].append(uid)
+        history = cls(subs, keyframe_every=keyframe_every)
+        for t, group in df[len(initial):].groupby("t", sort=False):
+            changes = list(zip(group.uid.tolist(), group.media.tolist(), group.op.tolist()))
+            for uid, mid, op in changes:
+                if op == cls.SUBSCRIBE:
+                    subs[mid].append(uid)
+                else:
+                    subs[mid].remove(uid)
+            history.record(t, subs, changes)
+        history.record(df.attrs.get("T", history.T), subs)
+        return history
+
+
+def iter_json_networks(path, chunk = 1 << 20):
+    """Stream the time steps of a legacy JSON network file.
+
+    The file is read in chunks and decoded one "Time_t": [edges] entry at
+    a time, so memory holds a single edge list rather than the whole file.
+
+    Args:
+        path (str): Path to the JSON file
+        chunk (int, optional): Characters read at a time. Defaults to 1 MiB.
+
+    Yields:
+        tuple: (t, list of (source, target) edges) in file order
+    """
+    decoder = js.JSONDecoder()
+    with open(path, "r") as f:
+        buffer, pos = "", 0
+
+        def fill():
+            # Append the next chunk to the unread part of the buffer
+            nonlocal buffer, pos
+            data = f.read(chunk)
+            buffer, pos = buffer[pos:] + data, 0
+            return bool(data)
+
+        def skip(chars):
+            # Skip separators; False at the end of the file
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return pos < len(buffer)
+
+        def decode():
+            # Decode the next key or edge list, reading on until it is complete
+            nonlocal pos
+            while True:
+                try:
+                    value, pos = decoder.raw_decode(buffer, pos)
+                    return value
+                except js.JSONDecodeError:
+                    if not fill():
+                        raise
+
+        skip(" \t\r\n{")
+        while skip(" \t\r\n,") and buffer[pos] != "}":
+            key = decode()
+            skip(" \t\r\n:")
+            edges = decode()
+            yield int(re.sub(r"\D", "", key)), [(u, v) for u, v in edges]
+
+
+def load_opinions(path, keyframe_every = 1000):
+    """Load an opinions parquet file (tall or legacy wide layout).
+
+    Args:
+        path (str): Path to the parquet file
+        keyframe_every (int, optional): Time steps between dense keyframes.
+                                        Defaults to 1000.
+
+    Returns:
+        OpinionHistory: Opinion history of the run
+    """
+    return OpinionHistory.from_frame(pd.read_parquet(path), keyframe_every=keyframe_every)
+
+
+def read_opinions(path, start = 0, stop = None, uids = None, dtype = np.float32):
+    """Read a (time x agent) opinion matrix for a time range and set of agents.
+
+    Only the rows of the tall table with t < stop and a requested uid are
+    read: the table is sorted by time, so row groups past the range are
+    skipped using their statistics. Legacy wide files are read whole.
+
+    Args:
+        path (str): Path to the opinions parquet file
+        start (int, optional): First time step. Defaults to 0.
+        stop (int, optional): End time step (exclusive). Defaults to the
+                              last recorded step + 1.
+        uids (list, optional): Agents, in the column order of the result.
+                               Defaults to all agents.
+        dtype (np.dtype, optional): Output dtype. Defaults to np.float32.
+
+    Returns:
+        np.ndarray: Array of shape (stop - start, number of agents)
+    """
+    filters = []
+    if stop is not None:
+        filters.append(("t", "<", stop))
+    if uids is not None:
+        filters.append(("uid", "in", [int(uid) for uid in uids]))
+    if pq.read_schema(path).names != ["t", "uid", "value"]:
+        M = load_opinions(path).matrix(start, stop, dtype=dtype)
+        return M if uids is None else M[:, list(uids)]
+    df = pd.read_parquet(path, filters=filters or None)
+    if uids is not None:
+        # Number the requested agents 0..k-1 in the given order
+        df = df.assign(uid=pd.Index(uids).get_indexer(df.uid).astype(np.int32))
+    history = OpinionHistory.from_frame(df)
+    return history.matrix(start, history.T + 1 if stop is None else stop, dtype=dtype)
+
+
+def load_networks(path, keyframe_every = 1000):
+    """Load a networks parquet file written by ``NetworkHistory.to_frame``,
+    or a legacy JSON file with the edge list of every time step.
+
+    Args:
+        path (str): Path to the parquet or JSON file
+        keyframe_every (int, optional): Time steps between full snapshots.
+                                        Defaults to 1000.
+
+    Returns:
+        NetworkHistory: Network history of the run
+    """
+    if path.endswith(".json"):
+        return NetworkHistory.from_json(path, keyframe_every=keyframe_every)
+    return NetworkHistory.from_frame(pd.read_parquet(path), keyframe_every=keyframe_every)
+
+
+def load_subscriptions(path, keyframe_every = 1000):
+    """Load a subscriptions parquet file written by ``SubscriptionHistory.to_frame``.
+
+    Args:
+        path (str): Path to the parquet file
+        keyframe_every (int, optional): Time steps between full snapshots.
+                                        Defaults to 1000.
+
+    Returns:
+        SubscriptionHistory: Subscription history of the run
+    """
+    return SubscriptionHistory.from_frame(pd.read_parquet(path), keyframe_every=keyframe_every)
@@ -16,8 +16,10 @@ Classes:
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import numpy as np, pandas as pd
-import copy
+import numpy as np
+from History import SubscriptionHistory
+from ids import media_ids
+from RandomPool import default_pool
 
 class MassMedia():
     """Mass Media Systems for Agent-Based Simulation.
@@ -28,17 +30,22 @@ class MassMedia():
     subscribers.
     
     Attributes:
+        rng (RandomPool): Random stream of the run
         p (float): Media activity probability
         s (float): Audience share parameter (proportion of users exposed)
         n (int): Number of media systems
         agents (int): Total number of users in the simulation
-        mids (list): Media system identifiers
+        mids (list): Media system ids (agents, agents+1, ...; see ``ids``)
         shares (list): Market share of each media system
         init_subs (list): Initial subscriber lists for each media
-        subs (dict): Current subscriber mapping {media_id: [user_ids]}
-        Subs_db (dict): Historical subscription data
+        subs (dict): Current subscribers {media_id: {user_id: None}}, kept as
+                     insertion-ordered dicts for O(1) membership changes
+        user_subs (dict): Reverse index {user_id: set of media_ids}
+        O (np.ndarray): Live opinion vector of all users (shared with the platform)
+        Subs_db (SubscriptionHistory): Subscribe/cancel event log
+        sub_changes (list): (uid, media_id, op) events of the current step
     """
-    def __init__(self, p, s, n, agents = 100):
+    def __init__(self, p, s, n, agents = 100, O = None, rng = None):
         """Initialize mass media systems.
         
         Args:
@@ -46,22 +53,38 @@ class MassMedia():
             s (float): Audience share parameter (0-1)
             n (int): Number of media systems
             agents (int, optional): Total number of users. Defaults to 100.
+            O (np.ndarray, optional): Live opinion vector of the platform, updated
+                                      in place. Defaults to all-zero opinions.
+            rng (RandomPool, optional): Random number source of the run.
+                                        Defaults to a freshly seeded one.
         """
+        self.rng = default_pool(rng)  # Random stream of the run
         self.p = p          # Media activity probability
         self.s = s          # Audience share parameter
         self.n = n          # Number of media systems
         self.agents = agents # Total number of users
         
-        # Create media system identifiers
-        self.mids = ["m"+str(i) for i in range(n)]
+        # Media ids follow the user ids in the shared id space
+        self.mids = media_ids(agents, n)
         
         # Initialize market shares and subscriber base
         self.shares = self.init_share()
         self.init_subs = self.split_list()
-        self.subs = {self.mids[i]: self.init_subs[i] for i in range(n)}
+        self.subs = {self.mids[i]: dict.fromkeys(self.init_subs[i]) for i in range(n)}
+        self._mid_index = {mid: i for i, mid in enumerate(self.mids)}
+        self.user_subs = {}
+        for mid, uids in self.subs.items():
+            for uid in uids:
+                self.user_subs.setdefault(uid, set()).add(mid)
+        
+        # Running sums/counts of subscriber opinions per media system
+        self.O = np.zeros(agents) if O is None else O
+        self._aud_sum = np.array([np.sum(self.O[uids]) for uids in self.init_subs], dtype=np.float64)
+        self._aud_count = np.array([len(self.subs[mid]) for mid in self.mids], dtype=np.float64)
         
         # Initialize subscription tracking
-        self.Subs_db = {"Time_0": copy.deepcopy(self.subs)}
+        self.Subs_db = SubscriptionHistory(self.subs)
+        self.sub_changes = []  # Subscription changes not yet recorded
         
     def init_share(self):
         """Initialize market share for each media system.
@@ -73,7 +96,7 @@ class MassMedia():
             list: Market share (number of potential subscribers) for each media system
         """
         holders = np.ones(self.agents)
-        splits = np.random.choice(np.arange(1, self.agents), self.n-1, replace=False)
+        splits = self.rng.choice(np.arange(1, self.agents), self.n-1, replace=False)
         splits = [0] + list(sorted(splits)) + [self.agents]
         res = [int(np.sum(holders[splits[i]:splits[i+1]])) for i in range(self.n)]
         return res 
@@ -93,7 +116,7 @@ class MassMedia():
         
         # Calculate total audience size based on reach parameter
         aud_size = int(np.ceil(self.agents * self.s))
-        aud_ids = np.random.choice(np.arange(self.agents), aud_size, replace=False)
+        aud_ids = self.rng.choice(np.arange(self.agents), aud_size, replace=False)
         
         # Calculate subscriber count for each media based on market share
         sizes = np.int32(np.ceil(np.array(self.shares) * self.s))
@@ -116,41 +139,44 @@ class MassMedia():
             list: List of subscriber lists for each media system (with possible overlap)
         """
         aud_size = int(np.ceil(self.agents * self.s))
-        aud_ids = np.random.choice(np.arange(self.agents), aud_size, replace=False)
+        aud_ids = self.rng.choice(np.arange(self.agents), aud_size, replace=False)
         sizes = np.int32(np.ceil(np.array(self.shares) * self.s))
-        return [np.random.choice(aud_ids, size, replace=False) for size in sizes]
+        return [self.rng.choice(aud_ids, size, replace=False) for size in sizes]
     
-    def media_message(self, mid, Os, d = .25):
-        """Generate a media message based on audience opinion.
+    def media_messages(self, d = .25):
+        """Generate this time step's media messages based on audience opinion.
         
-        Each media system generates content that reflects the average opinion
-        of its current subscribers, with some random noise added.
+        Each media system posts with probability p; its content reflects the
+        average opinion of its current subscribers, with some random noise
+        added. The audience means are kept up to date incrementally, so all
+        media systems are handled in one vectorized draw.
         
         Args:
-            mid (str): Media system identifier
-            Os (np.ndarray): Current opinion state of all users
             d (float, optional): Noise parameter for content generation. Defaults to 0.25.
             
         Returns:
-            pd.DataFrame or None: Message data if generated, None otherwise
+            list: Messages as (original_poster, rt_poster, content, rt_status)
+                  tuples, one per posting media system
         """
-        if np.random.rand() < self.p:
-            # Get current subscribers
-            recent = self.Subs_db[list(self.Subs_db.keys())[-1]]
-            
-            # Calculate content based on subscriber opinions + noise
-            v = np.mean(Os[recent[mid]]) + d * (np.random.rand() * 2 - 1)
-            
-            # Create message
-            post = pd.DataFrame({
-                "original_poster": [mid], 
-                "rt_poster": [mid], 
-                "content": [v], 
-                "rt_status": [False]
-            })
-            return post
-        else:
-            return None
+        active = self.rng.random(self.n) < self.p
+        noise = d * (self.rng.random(self.n) * 2 - 1)
+        
+        # Calculate content based on current subscriber opinions + noise
+        with np.errstate(invalid="ignore", divide="ignore"):
+            v = self._aud_sum / self._aud_count + noise
+        return [(self.mids[i], self.mids[i], v[i], False) for i in np.flatnonzero(active)]
+    
+    def update_audience(self, uid, old_o):
+        """Propagate a user's opinion change to the audience sums.
+        
+        Args:
+            uid (int): User ID whose opinion in O has just changed
+            old_o (float): The user's previous opinion
+        """
+        delta = self.O[uid] - old_o
+        if delta != 0:
+            for mid in self.user_subs.get(uid, ()):
+                self._aud_sum[self._mid_index[mid]] += delta
     
     def find_subs(self, uid):
         """Find which media systems a user subscribes to.
@@ -161,7 +187,7 @@ class MassMedia():
         Returns:
             list: List of media system IDs that the user subscribes to
         """
-        subs = [k for k, v in self.subs.items() if uid in v]
+        subs = sorted(self.user_subs.get(uid, ()))
         return subs
         
     def cancel(self, uid, foe_target):
@@ -169,27 +195,40 @@ class MassMedia():
         
         Args:
             uid (int): User ID
-            foe_target (str): Media system ID to unsubscribe from
+            foe_target (int): Media system ID to unsubscribe from
         """
-        self.subs[foe_target].remove(uid)
+        del self.subs[foe_target][uid]
+        self.user_subs[uid].discard(foe_target)
+        i = self._mid_index[foe_target]
+        self._aud_sum[i] -= self.O[uid]
+        self._aud_count[i] -= 1
+        if self._aud_count[i] == 0:
+            # Drop the rounding remainder so an empty audience averages to nan
+            self._aud_sum[i] = 0.
+        self.sub_changes.append((uid, foe_target, SubscriptionHistory.CANCEL))
     
     def subscribe(self, uid, fri_target):
         """Subscribe user to a media system.
         
         Args:
             uid (int): User ID  
-            fri_target (str): Media system ID to subscribe to
+            fri_target (int): Media system ID to subscribe to
         """
-        if uid not in self.subs[fri_target]:
-            self.subs[fri_target].append(uid)
+        if fri_target not in self.user_subs.setdefault(uid, set()):
+            self.subs[fri_target][uid] = None
+            self.user_subs[uid].add(fri_target)
+            i = self._mid_index[fri_target]
+            self._aud_sum[i] += self.O[uid]
+            self._aud_count[i] += 1
+            self.sub_changes.append((uid, fri_target, SubscriptionHistory.SUBSCRIBE))
 
     def update_Sub_DB(self, t):
-        """Record current subscription state.
+        """Record this step's subscription changes.
         
         Args:
             t (int): Current time step
         """
-        self.Subs_db["Time_{}".format(t)] = copy.deepcopy(self.subs)
+        self.Subs_db.record(t+1, self.subs, self.sub_changes)
 
 
         
@@ -0,0 +1,271 @@
+"""Message Store Module for Agent-Based Media Effects Simulation.
+
+This module implements the append-only message table of the social media
+platform. Messages are kept in typed NumPy columns that grow by amortized
+doubling, so posting a message costs O(1) instead of copying the whole
+message history. An inverted index from poster to message positions lets
+a user's screen be assembled from the few most recent posts of each followee
+without scanning the whole history. A pandas DataFrame is only built when
+results are exported. Once messages are saved elsewhere (e.g. streamed to
+disk), the store drops those that the model can no longer read, so its
+memory and its checkpoints do not grow with the length of the run.
+
+Classes:
+    MessageStore: Growable columnar store of all platform messages
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import heapq
+from bisect import bisect_left
+from array import array
+from itertools import chain
+import numpy as np, pandas as pd
+from ids import to_labels
+
+class MessageStore():
+    """Growable columnar store of posts and reposts.
+
+    Posters are stored as int32 ids in the shared user/media id space
+    (see ``ids``); legacy "m{k}" labels are only produced on export.
+
+    Messages are addressed by their row in the store. Rows only change when
+    ``release`` drops saved messages, which happens between time steps;
+    ``position`` maps rows to positions in the full message history.
+
+    Attributes:
+        n (int): Number of users (media ids start at n)
+        size (int): Number of messages posted
+        original_poster (np.ndarray): Ids of the original authors
+        rt_poster (np.ndarray): Ids of the (re)posters
+        content (np.ndarray): Opinion value carried by each message
+        rt_status (np.ndarray): Whether each message is a repost
+        reach (int or None): Number of most recent (re)posts of each poster
+                             that the model can still read; None keeps all
+                             messages
+        saved (int): Number of leading messages saved elsewhere, which are
+                     dropped once out of reach
+    """
+    COLUMNS = ["original_poster", "rt_poster", "content", "rt_status"]
+    _PRIVATE = ["_original_poster", "_rt_poster", "_content", "_rt_status", "_position"]
+
+    def __init__(self, n, capacity = 1024):
+        """Initialize an empty message store.
+
+        Args:
+            n (int): Number of users
+            capacity (int, optional): Initial number of preallocated rows.
+                                      Defaults to 1024.
+        """
+        self.n = n
+        self.size = 0
+        self._rows = 0
+        self._original_poster = np.empty(capacity, dtype=np.int32)
+        self._rt_poster = np.empty(capacity, dtype=np.int32)
+        self._content = np.empty(capacity, dtype=np.float64)
+        self._rt_status = np.empty(capacity, dtype=bool)
+        self._position = np.empty(capacity, dtype=np.int64)  # Row -> position in the history
+        self._by_poster = {}  # Poster id -> rows of its (re)posts
+        self.reach = None
+        self.saved = 0
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        # Pickle the stored rows only, not the spare capacity
+        state = self.__dict__.copy()
+        for name in self._PRIVATE:
+            state[name] = getattr(self, name)[:self._rows]
+        return state
+
+    @property
+    def original_poster(self):
+        return self._original_poster[:self._rows]
+
+    @property
+    def rt_poster(self):
+        return self._rt_poster[:self._rows]
+
+    @property
+    def content(self):
+        return self._content[:self._rows]
+
+    @property
+    def rt_status(self):
+        return self._rt_status[:self._rows]
+
+    def _grow(self):
+        """Double the capacity of every column."""
+        capacity = max(2 * len(self._content), 1)
+        for name in self._PRIVATE:
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._rows] = old[:self._rows]
+            setattr(self, name, new)
+
+    def append(self, original_poster, rt_poster, content, rt_status):
+        """Append one message to the store.
+
+        Args:
+            original_poster (int): Id of the author of the content
+            rt_poster (int): Id of the user/media posting the message
+            content (float): Opinion value of the message
+            rt_status (bool): Whether the message is a repost
+
+        Returns:
+            int: Row of the new message
+        """
+        if self._rows == len(self._content):
+            self._grow()
+        i = self._rows
+        self._original_poster[i] = original_poster
+        self._rt_poster[i] = rt_poster
+        self._content[i] = content
+        self._rt_status[i] = rt_status
+        self._position[i] = self.size
+        self._by_poster.setdefault(int(rt_poster), array("q")).append(i)
+        self._rows += 1
+        self.size += 1
+        return i
+
+    def position(self, rows):
+        """Positions of stored messages in the full message history.
+
+        Args:
+            rows (np.ndarray): Rows of the messages
+
+        Returns:
+            np.ndarray: Positions of the messages
+        """
+        return self._position[rows]
+
+    def since(self, start):
+        """Columns of the messages from position ``start`` of the history on.
+
+        Args:
+            start (int): Position of the first message
+
+        Returns:
+            dict: Column name -> values, in ``COLUMNS`` order
+
+        Raises:
+            ValueError: If some of the messages were dropped
+        """
+        i = self._rows - (self.size - start)
+        if i < 0 or (i < self._rows and self._position[i] != start):
+            raise ValueError(f"Messages from position {start} on were partly dropped")
+        return {name: getattr(self, name)[i:] for name in self.COLUMNS}
+
+    def release(self, saved):
+        """Mark the leading messages as saved elsewhere.
+
+        When ``saved`` moves forward, the saved messages that are not among
+        the last ``reach`` (re)posts of their poster are dropped and the
+        remaining rows are moved up, so rows handed out before are no longer
+        valid. Only call it between time steps.
+
+        Args:
+            saved (int): Number of leading messages saved elsewhere
+        """
+        if self.reach is None or saved <= self.saved:
+            self.saved = max(self.saved, saved)
+            return
+        self.saved = saved
+        first = int(np.searchsorted(self._position[:self._rows], saved))
+        tails = {}
+        for poster, rows in self._by_poster.items():
+            # The reachable tail and all unsaved (re)posts of each poster
+            tails[poster] = rows[max(0, min(len(rows) - self.reach, bisect_left(rows, first))):]
+        kept = np.sort(np.fromiter(chain.from_iterable(tails.values()), dtype=np.int64))
+        if len(kept) == self._rows:
+            return
+        for name in self._PRIVATE:
+            column = getattr(self, name)
+            column[:len(kept)] = column[kept]
+        remap = np.empty(self._rows, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+        self._by_poster = {poster: array("q", remap[np.frombuffer(rows, dtype=np.int64)].tobytes())
+                           for poster, rows in tails.items()}
+        self._rows = len(kept)
+
+    def recent(self, posters, l):
+        """Find the l most recent messages (re)posted by any of the posters.
+
+        Merges the last l rows of each poster's index, so the cost
+        depends on the number of posters and l, not on the history length.
+
+        Args:
+            posters (iterable): User and/or media ids
+            l (int): Maximum number of messages to return
+
+        Returns:
+            np.ndarray: Message rows in posting order
+        """
+        if l <= 0:
+            return np.empty(0, dtype=np.int64)
+        tails = [self._by_poster[c][-l:] for c in posters if c in self._by_poster]
+        idx = heapq.nlargest(l, chain.from_iterable(tails))
+        return np.array(idx[::-1], dtype=np.int64)
+
+    def recent_excluding(self, posters, k):
+        """Find the k most recent messages not (re)posted by any of the posters.
+
+        Walks back from the newest message in geometrically growing blocks
+        and stops as soon as k qualifying messages are found, so the cost is
+        O(k + skipped messages) rather than O(all messages).
+
+        Args:
+            posters (iterable): User and/or media ids to exclude
+            k (int): Maximum number of messages to return
+
+        Returns:
+            np.ndarray: Message rows in posting order
+        """
+        excluded = np.fromiter(posters, dtype=np.int32)
+        found = []
+        need = k
+        stop = self._rows
+        block = 2 * k
+        while stop > 0 and need > 0:
+            start = max(0, stop - block)
+            keep = np.flatnonzero(~np.isin(self._rt_poster[start:stop], excluded)) + start
+            keep = keep[-need:] if need < len(keep) else keep
+            found.append(keep)
+            need -= len(keep)
+            stop = start
+            block *= 2
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(found[::-1]).astype(np.int64)
+
+    def to_frame(self, labels = False):
+        """Export all messages as a DataFrame with the Message_db layout.
+
+        Args:
+            labels (bool, optional): Write posters as legacy string labels
+                                     ("12", "m0") instead of int32 ids.
+                                     Defaults to False.
+
+        Returns:
+            pd.DataFrame: One row per message, in posting order; the number
+                          of users is kept in ``attrs['n']``
+
+        Raises:
+            ValueError: If saved messages were dropped
+        """
+        if self._rows != self.size:
+            raise ValueError("Saved messages were dropped from the store; "
+                             "read them from where they were saved")
+        original_poster, rt_poster = self.original_poster.copy(), self.rt_poster.copy()
+        if labels:
+            original_poster = to_labels(original_poster, self.n)
+            rt_poster = to_labels(rt_poster, self.n)
+        df = pd.DataFrame({
+            "original_poster": original_poster,
+            "rt_poster": rt_poster,
+            "content": self.content.copy(),
+            "rt_status": self.rt_status.copy()
+        })
+        df.attrs["n"] = self.n
+        return df
@@ -0,0 +1,135 @@
+"""Random Pool Module for Agent-Based Media Effects Simulation.
+
+This module implements a block-buffered source of random numbers for the
+per-step hot loop. Every time step makes a handful of scalar draws (which
+user is active, screen size, noise, whether to post or rewire, which
+message or target to pick), and each scalar call on a NumPy Generator
+costs about a microsecond of overhead. The pool draws uniforms from the
+Generator in large blocks and serves them one by one from a Python list,
+deriving integers and choices from single uniforms, so the results stay
+deterministic for a given seed.
+
+Classes:
+    RandomPool: Block-buffered uniforms with a Generator-like interface
+
+Functions:
+    default_pool: Build a pool from a seed, Generator or existing pool
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import numpy as np
+
+class RandomPool():
+    """Block-buffered uniforms drawn from a ``np.random.Generator``.
+
+    Offers ``random``, ``integers`` and ``choice`` like a Generator; other
+    methods (``uniform``, ``choice`` without replacement, ...) are passed on
+    to the underlying generator.
+
+    Attributes:
+        generator (np.random.Generator): Source of the uniforms
+        block (int): Number of uniforms drawn per refill
+    """
+    def __init__(self, seed = None, block = 4096):
+        """Initialize the pool.
+
+        Args:
+            seed (int, SeedSequence or Generator, optional): Seed of the generator.
+                                                             Defaults to fresh entropy.
+            block (int, optional): Number of uniforms drawn per refill.
+                                   Defaults to 4096.
+        """
+        self.generator = np.random.default_rng(seed)
+        self.block = block
+        self._refill()
+
+    def __getattr__(self, name):
+        if name == "generator":
+            raise AttributeError(name)
+        return getattr(self.generator, name)
+
+    def _refill(self):
+        self._buffer = self.generator.random(self.block).tolist()
+        self._i = 0
+
+    def _take(self, k):
+        """Next k uniforms as an array."""
+        out = np.empty(k)
+        done = 0
+        while done < k:
+            if self._i == self.block:
+                self._refill()
+            take = min(k - done, self.block - self._i)
+            out[done:done + take] = self._buffer[self._i:self._i + take]
+            self._i += take
+            done += take
+        return out
+
+    def random(self, size = None):
+        """Uniform(s) in [0, 1).
+
+        Args:
+            size (int, optional): Number of values. Defaults to a single float.
+
+        Returns:
+            float or np.ndarray: Uniform value(s)
+        """
+        if size is not None:
+            return self._take(size)
+        i = self._i
+        if i == self.block:
+            self._refill()
+            i = 0
+        self._i = i + 1
+        return self._buffer[i]
+
+    def integers(self, low, high = None, size = None):
+        """Integer(s) uniform in [low, high), or [0, low) if high is None.
+
+        Args:
+            low (int): Lowest value (or upper bound if high is None)
+            high (int, optional): Upper bound (exclusive). Defaults to None.
+            size (int, optional): Number of values. Defaults to a single int.
+
+        Returns:
+            int or np.ndarray: Integer value(s)
+        """
+        if high is None:
+            low, high = 0, low
+        if size is not None:
+            return low + (self._take(size) * (high - low)).astype(np.int64)
+        return low + int(self.random() * (high - low))
+
+    def choice(self, a, size = None, replace = True, p = None):
+        """Uniformly pick one element of a sequence.
+
+        Only single uniform picks are served from the pool; other calls are
+        passed on to ``Generator.choice``.
+
+        Args:
+            a (sequence): Elements to choose from
+            size (int, optional): Number of values. Defaults to None.
+            replace (bool, optional): Sample with replacement. Defaults to True.
+            p (array, optional): Probabilities of the elements. Defaults to None.
+
+        Returns:
+            Chosen element(s)
+        """
+        if size is None and p is None and not isinstance(a, (int, np.integer)):
+            return a[int(self.random() * len(a))]
+        return self.generator.choice(a, size=size, replace=replace, p=p)
+
+def default_pool(seed = None):
+    """Build a random pool, reusing ``seed`` if it already is one.
+
+    Args:
+        seed (int, SeedSequence, Generator or RandomPool, optional): Seed of
+              the pool. Defaults to fresh entropy.
+
+    Returns:
+        RandomPool: Pool drawing from the seeded generator
+    """
+    if isinstance(seed, RandomPool):
+        return seed
+    return RandomPool(seed)
@@ -0,0 +1,386 @@
+"""Recorder Module for Agent-Based Media Effects Simulation.
+
+This module decouples what the simulation records from how it runs. The
+main loop in ``sim.sim`` only updates the live state of the platform and
+the media; after every active time step it hands the step's outcome to one
+or more recorders, which decide what to keep.
+
+Classes:
+    Recorder: Base class defining the recorder callbacks
+    HistoryRecorder: Default recorder filling the in-memory histories
+    ParquetRecorder: Recorder streaming the histories to Parquet files
+    ComponentRecorder: Recorder tracking the connected components of the network
+    EntropyRecorder: Recorder tracking the binned opinion entropy
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import json
+import numpy as np, pyarrow as pa, pyarrow.parquet as pq
+from History import EventLog
+from Components import ComponentTracker
+from Entropy import OpinionEntropy
+
+class Recorder():
+    """Base class for simulation recorders.
+
+    ``sim.sim`` calls ``start`` once before the first step, ``record`` after
+    every time step in which a user was active, and ``finish`` once after
+    the last step. The network and subscription changes of the step are
+    available as ``sm.edge_changes`` and ``md.sub_changes`` during
+    ``record``. Before the state of a run is checkpointed, ``checkpoint``
+    is called and the recorders are pickled with it. After every step,
+    messages that every recorder reports as ``saved_messages`` are dropped
+    from the message store once the model can no longer read them. The base
+    class records nothing.
+    """
+    def start(self, sm, md):
+        """Prepare for a run.
+
+        Args:
+            sm (SocialMedia): Social media platform instance
+            md (MassMedia): Mass media systems instance
+        """
+        pass
+
+    def record(self, t, sm, md, uid, new_o, fri, foe):
+        """Record the outcome of time step t.
+
+        Args:
+            t (int): Current time step
+            sm (SocialMedia): Social media platform instance
+            md (MassMedia): Mass media systems instance
+            uid (int): Active user
+            new_o (float or None): User's new opinion, or None if unchanged
+            fri (np.ndarray or None): Positions of friendly messages on the screen
+            foe (np.ndarray or None): Positions of hostile messages on the screen
+        """
+        pass
+
+    def checkpoint(self, sm, md):
+        """Prepare for the run's state, including this recorder, to be saved.
+
+        Args:
+            sm (SocialMedia): Social media platform instance
+            md (MassMedia): Mass media systems instance
+        """
+        pass
+
+    def saved_messages(self, sm):
+        """Number of leading messages this recorder has saved elsewhere.
+
+        Args:
+            sm (SocialMedia): Social media platform instance
+
+        Returns:
+            int: Messages that need not be kept in memory for this
+                 recorder (none for the base class)
+        """
+        return 0
+
+    def finish(self, sm, md):
+        """Finalize the records after the last time step.
+
+        Args:
+            sm (SocialMedia): Social media platform instance
+            md (MassMedia): Mass media systems instance
+        """
+        pass
+
+class HistoryRecorder(Recorder):
+    """Record the full in-memory histories kept on the platform and media.
+
+    Fills ``sm.Opinions_db``, ``sm.Network_db``, ``md.Subs_db`` and,
+    optionally, ``sm.ME_db``.
+
+    Attributes:
+        effect_record (bool): Whether media effects are recorded
+        media_effects_only (bool): Whether only effects of media-originated
+                                   messages are recorded
+    """
+    def __init__(self, effect_record = True, media_effects_only = False):
+        """Initialize the recorder.
+
+        Args:
+            effect_record (bool, optional): Record media effects data.
+                                            Defaults to True.
+            media_effects_only (bool, optional): Only record effects of messages
+                                                 originally posted by media.
+                                                 Defaults to False.
+        """
+        self.effect_record = effect_record
+        self.media_effects_only = media_effects_only
+
+    def record(self, t, sm, md, uid, new_o, fri, foe):
+        sm.update_Opinions_db(uid, new_o, t)
+        if self.effect_record:
+            sm.update_ME_db(t, uid, fri, foe, media_only=self.media_effects_only)
+        sm.update_Network_db(t)
+        md.update_Sub_DB(t)
+
+class ParquetRecorder(Recorder):
+    """Stream the histories to Parquet files while the simulation runs.
+
+    Writes the tall tables of ``run.run`` (opinions, messages, networks,
+    effects and subscriptions, in the layout of the histories' ``to_frame``)
+    without keeping the histories in memory: at most ``row_group`` new rows
+    per table are buffered before they are written out as a row group of a
+    part file ``{file}.part{k}``. ``finish`` merges the parts into the final
+    file under a temporary name and renames it, so a file at the final path
+    is always complete, while an unfinished run only leaves part files.
+
+    All rows are buffered in the recorder's own logs, so the in-memory
+    histories on the platform and the media are left untouched (and can be
+    filled by a ``HistoryRecorder`` in the same run). Written messages are
+    reported as ``saved_messages``, so the message store can drop those
+    that no screen or recommendation can still show.
+
+    Attributes:
+        path (str): Output path with a ``{table}`` field, e.g.
+                    ``"out/{table}/0_{table}.parquet"``
+        tables (list): Tables to write
+        effect_record (bool): Whether media effects are recorded
+        media_effects_only (bool): Whether only effects of media-originated
+                                   messages are recorded
+        row_group (int): Rows per row group (and buffer size) of each table
+        T (int): Last recorded time step
+    """
+    TABLES = ["opinions", "messages", "networks", "effects", "subscriptions"]
+
+    def __init__(self, path, tables = None, effect_record = True,
+                 media_effects_only = False, row_group = 65536):
+        """Initialize the recorder.
+
+        Args:
+            path (str): Output path with a ``{table}`` field
+            tables (list, optional): Tables to write. Defaults to all of ``TABLES``.
+            effect_record (bool, optional): Record media effects data.
+                                            Defaults to True.
+            media_effects_only (bool, optional): Only record effects of messages
+                                                 originally posted by media.
+                                                 Defaults to False.
+            row_group (int, optional): Rows per row group. Defaults to 65536.
+        """
+        self.path = path
+        self.tables = self.TABLES if tables is None else list(tables)
+        self.effect_record = effect_record
+        self.media_effects_only = media_effects_only
+        self.row_group = row_group
+        self.T = 0
+        self._buffers = {
+            "opinions": EventLog({"t": np.int64, "uid": np.int32, "value": np.float64}),
+            "networks": EventLog({"t": np.int64, "source": np.int32,
+                                  "target": np.int32, "op": np.int8}),
+            "subscriptions": EventLog({"t": np.int64, "uid": np.int32,
+                                       "media": np.int64, "op": np.int8}),
+            "effects": EventLog({"uid": np.int32, "Time": np.int64,
+                                 "index": np.int64, "effects": bool})
+        }
+        self._messages = 0  # Messages written so far
+        self._parts = {table: 0 for table in self.tables}  # Part files per table
+        self._writers = {}
+
+    def __getstate__(self):
+        # Open writers are closed by checkpoint() and reopened on the next part
+        state = self.__dict__.copy()
+        state["_writers"] = {}
+        return state
+
+    def _file(self, table):
+        return self.path.format(table=table)
+
+    def _part(self, table, k):
+        return f"{self._file(table)}.part{k}"
+
+    def _write(self, table, columns):
+        """Write columns of a table as a row group of its current part file."""
+        if table not in self.tables:
+            return
+        batch = pa.table(columns)
+        if table not in self._writers:
+            self._writers[table] = pq.ParquetWriter(self._part(table, self._parts[table]),
+                                                    batch.schema)
+            self._parts[table] += 1
+        self._writers[table].write_table(batch)
+
+    def _flush(self, sm, full = False):
+        """Write out the buffers holding at least row_group rows (all if full)."""
+        limit = 1 if full else self.row_group
+        for table, buffer in self._buffers.items():
+            if len(buffer) >= limit:
+                self._write(table, {name: buffer[name] for name in buffer._columns})
+                buffer.size = 0
+        stop = sm.messages.size
+        if stop - self._messages >= limit:
+            self._write("messages", sm.messages.since(self._messages))
+            self._messages = stop
+
+    def start(self, sm, md):
+        # Files of an earlier run are replaced (a resumed run does not call start)
+        for table in self.tables:
+            if os.path.exists(self._file(table)):
+                os.remove(self._file(table))
+        # Initial state as t = 0 rows
+        O = sm.opinions()
+        self._buffers["opinions"].extend(len(O), 0, np.arange(len(O)), O)
+        edges = sm.Network_db.keyframes[0]
+        self._buffers["networks"].extend(len(edges), 0, edges[:, 0], edges[:, 1], 1)
+        for mid, uids in md.subs.items():
+            self._buffers["subscriptions"].extend(len(uids), 0, list(uids), mid, 1)
+        self._flush(sm)
+
+    def record(self, t, sm, md, uid, new_o, fri, foe):
+        self.T = int(t) + 1
+        if new_o:
+            self._buffers["opinions"].append(t + 1, uid, new_o)
+        if self.effect_record:
+            sm.update_ME_db(t, uid, fri, foe, media_only=self.media_effects_only,
+                            log=self._buffers["effects"])
+        for source, target, op in sm.edge_changes:
+            self._buffers["networks"].append(t + 1, source, target, op)
+        for sub, mid, op in md.sub_changes:
+            self._buffers["subscriptions"].append(t + 1, sub, mid, op)
+        self._flush(sm)
+
+    def checkpoint(self, sm, md):
+        # Write out the buffers and close the open parts, so the checkpoint
+        # holds neither buffered rows nor messages that are already saved
+        self._flush(sm, full=True)
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def saved_messages(self, sm):
+        return self._messages if "messages" in self.tables else 0
+
+    def finish(self, sm, md):
+        self.checkpoint(sm, md)
+        attrs = {"opinions": {"T": self.T}, "messages": {"n": sm.n},
+                 "networks": {"T": self.T}, "effects": {},
+                 "subscriptions": {"T": self.T, "mids": list(md.mids)}}
+        for table in self.tables:
+            if table == "messages":
+                dtypes = [(name, getattr(sm.messages, name).dtype) for name in sm.messages.COLUMNS]
+            else:
+                dtypes = [(name, column.dtype) for name, column in self._buffers[table]._columns.items()]
+            self._commit(table, dtypes, attrs[table])
+        # Parts are only removed once every table is committed, so a run killed
+        # in between can still be resumed from its checkpoint
+        for table in self.tables:
+            self._remove_parts(table)
+
+    def _commit(self, table, dtypes, attrs):
+        """Merge the part files of a table into its final file, unless it already exists."""
+        file = self._file(table)
+        if os.path.exists(file):
+            # Committed before the run was killed and resumed
+            return
+        schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in dtypes])
+        if attrs:
+            schema = schema.with_metadata({"PANDAS_ATTRS": json.dumps(attrs)})
+        parts = [self._part(table, k) for k in range(self._parts[table])]
+        with pq.ParquetWriter(file + ".tmp", schema) as writer:
+            batches, rows = [], 0
+            for part in parts:
+                for batch in pq.ParquetFile(part).iter_batches(batch_size=self.row_group):
+                    batches.append(batch)
+                    rows += batch.num_rows
+                    if rows >= self.row_group:
+                        writer.write_table(pa.Table.from_batches(batches))
+                        batches, rows = [], 0
+            if batches:
+                writer.write_table(pa.Table.from_batches(batches))
+        os.replace(file + ".tmp", file)
+
+    def _remove_parts(self, table):
+        """Remove the parts of a table, including any left by a run killed after its last checkpoint."""
+        k = 0
+        while k < self._parts[table] or os.path.exists(self._part(table, k)):
+            if os.path.exists(self._part(table, k)):
+                os.remove(self._part(table, k))
+            k += 1
+
+class ComponentRecorder(Recorder):
+    """Track the number of connected components of the follow network.
+
+    The components are updated from each step's edge changes by a
+    ``ComponentTracker``, and the count is logged whenever it changes.
+
+    Attributes:
+        counts (EventLog): Component count from time step 't' on, columns
+                           't', 'count'
+        T (int): Last recorded time step
+    """
+    def __init__(self):
+        self.counts = EventLog({"t": np.int64, "count": np.int64})
+        self.T = 0
+
+    def start(self, sm, md):
+        edges = sm.G.edges()
+        self._tracker = ComponentTracker(edges.tolist() if isinstance(edges, np.ndarray) else edges)
+        self.counts.append(0, self._tracker.count)
+
+    def record(self, t, sm, md, uid, new_o, fri, foe):
+        self.T = int(t) + 1
+        if sm.edge_changes:
+            self._tracker.apply(sm.edge_changes)
+            if self._tracker.count != self.counts["count"][-1]:
+                self.counts.append(t + 1, self._tracker.count)
+
+    def series(self, stop = None):
+        """Component count at every time step.
+
+        Args:
+            stop (int, optional): End time step (exclusive). Defaults to T + 1.
+
+        Returns:
+            np.ndarray: Component counts for time steps 0..stop-1
+        """
+        stop = self.T + 1 if stop is None else stop
+        i = np.searchsorted(self.counts["t"], np.arange(stop), side="right") - 1
+        return self.counts["count"][i]
+
+class EntropyRecorder(Recorder):
+    """Track the binned opinion entropy (see ``Entropy``).
+
+    The bin counts are updated in O(1) per opinion change by an
+    ``OpinionEntropy``, and the entropy is logged whenever it changes.
+
+    Attributes:
+        nbins (int): Number of bins
+        values (EventLog): Entropy from time step 't' on, columns 't', 'entropy'
+        T (int): Last recorded time step
+    """
+    def __init__(self, nbins = 100):
+        """Initialize the recorder.
+
+        Args:
+            nbins (int, optional): Number of bins on [-1, 1]. Defaults to 100.
+        """
+        self.nbins = nbins
+        self.values = EventLog({"t": np.int64, "entropy": np.float64})
+        self.T = 0
+
+    def start(self, sm, md):
+        self._tracker = OpinionEntropy(sm.opinions(), nbins=self.nbins)
+        self.values.append(0, self._tracker.entropy)
+
+    def record(self, t, sm, md, uid, new_o, fri, foe):
+        self.T = int(t) + 1
+        if new_o:
+            self._tracker.update(uid, new_o)
+            if self._tracker.entropy != self.values["entropy"][-1]:
+                self.values.append(t + 1, self._tracker.entropy)
+
+    def series(self, stop = None):
+        """Entropy at every time step.
+
+        Args:
+            stop (int, optional): End time step (exclusive). Defaults to T + 1.
+
+        Returns:
+            np.ndarray: Entropies for time steps 0..stop-1
+        """
+        stop = self.T + 1 if stop is None else stop
+        i = np.searchsorted(self.values["t"], np.arange(stop), side="right") - 1
+        return self.values["entropy"][i]
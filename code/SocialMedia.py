@@ -16,16 +16,21 @@ Classes:
     
 Functions:
     constrained_sum_sample_pos: Generate degree sequence for network
+    random_edge_list: Draw the edges of a random directed network
     random_graph_revised: Create random directed graph with given degree sequence
 """
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import random
-import networkx as nx, numpy as np, pandas as pd
-import copy
+import networkx as nx, numpy as np
+from MessageStore import MessageStore
+from User import User
+from Graph import ArrayDiGraph
+from History import EventLog, OpinionHistory, NetworkHistory
+from ids import is_media
+from RandomPool import default_pool
 
-def constrained_sum_sample_pos(n, m):
+def constrained_sum_sample_pos(n, m, rng = None):
     """Generate a random sequence of positive integers that sum to m.
     
     This function creates a degree sequence for network generation by
@@ -34,6 +39,8 @@ def constrained_sum_sample_pos(n, m):
     Args:
         n (int): Number of integers in the sequence (number of nodes)
         m (int): Target sum (total number of edges)
+        rng (RandomPool, optional): Random number source.
+                                    Defaults to a freshly seeded one.
         
     Returns:
         list: List of n positive integers that sum to m
@@ -45,10 +52,36 @@ def constrained_sum_sample_pos(n, m):
         >>> sum(sequence)
         20
     """
-    dividers = sorted(random.sample(range(1, m), n - 1))
+    rng = default_pool(rng)
+    dividers = sorted((rng.choice(m - 1, n - 1, replace=False) + 1).tolist())
     return [a - b for a, b in zip(dividers + [m], [0] + dividers)]
 
-def random_graph_revised(n, m):
+def random_edge_list(n, m, rng = None):
+    """Draw the edges of a random directed network with n nodes and m edges.
+
+    Each node gets a random out-degree (summing to m) and follows that many
+    distinct other nodes chosen uniformly at random.
+
+    Args:
+        n (int): Number of nodes
+        m (int): Total number of directed edges
+        rng (RandomPool, optional): Random number source.
+                                    Defaults to a freshly seeded one.
+
+    Returns:
+        np.ndarray: (m x 2) directed edges (source, target), grouped by source
+    """
+    rng = default_pool(rng)
+    degree_squence = constrained_sum_sample_pos(n, m, rng)
+    targets = []
+    for i in range(n):
+        # Sample among the n-1 other nodes, skipping i itself
+        j = rng.choice(n - 1, degree_squence[i], replace=False)
+        targets.append(j + (j >= i))
+    sources = np.repeat(np.arange(n), degree_squence)
+    return np.column_stack([sources, np.concatenate(targets)]).astype(np.int32)
+
+def random_graph_revised(n, m, rng = None):
     """Create a random directed graph with specified number of nodes and edges.
     
     This function generates a random directed network where each node has
@@ -58,6 +91,8 @@ def random_graph_revised(n, m):
     Args:
         n (int): Number of nodes in the graph
         m (int): Total number of directed edges
+        rng (RandomPool, optional): Random number source.
+                                    Defaults to a freshly seeded one.
         
     Returns:
         networkx.DiGraph: Random directed graph with n nodes and m edges
@@ -69,16 +104,8 @@ def random_graph_revised(n, m):
         >>> G.number_of_edges()
         400
     """
-    degree_squence = constrained_sum_sample_pos(n, m)
-    node_ids = list(range(n))
-    edge_list = []
-    for i in node_ids:
-        non_self = [j for j in node_ids if i!= j]
-        targets = random.sample(non_self, degree_squence[i]) 
-        edges_of_n = [(i,target) for target in targets]
-        edge_list = edge_list+ edges_of_n
     G = nx.DiGraph()
-    G.add_edges_from(edge_list)
+    G.add_edges_from(random_edge_list(n, m, rng).tolist())
     return G
 
 #G = random_graph_revised(n, m)
@@ -92,45 +119,61 @@ class SocialMedia:
     over time for analysis.
     
     Attributes:
+        rng (RandomPool): Random stream shared by all components of the run
         p (float): Default activity probability
         n (int): Number of users in the network
         m (int): Number of edges in the network
         l (np.ndarray): Screen sizes for each user (activity levels)
-        G (networkx.DiGraph): User network graph
+        G (ArrayDiGraph or networkx.DiGraph): User network graph
         O (np.ndarray): Current opinions of all users
-        Opinions_db (dict): Historical opinion data for all time steps
-        Message_db (pd.DataFrame): All messages posted on the platform
-        Network_db (dict): Historical network structure data
-        ME_db (pd.DataFrame): Media effects tracking data
+        Opinions_db (OpinionHistory): Opinion change log for all time steps
+        messages (MessageStore): All messages posted on the platform
+        Message_db (pd.DataFrame): DataFrame view of ``messages`` for export
+        Network_db (NetworkHistory): Edge event log of the network
+        effects (EventLog): Media effects buffer ('uid', 'Time', 'index', 'effects')
+        ME_db (pd.DataFrame): DataFrame view of ``effects`` for export
+        edge_changes (list): (source, target, op) edge events of the current step
     """
     
-    def __init__(self, n = 100, m = 400):
+    def __init__(self, n = 100, m = 400, graph = "array", rng = None):
         """Initialize social media platform.
         
         Args:
             n (int, optional): Number of users. Defaults to 100.
             m (int, optional): Number of network edges. Defaults to 400.
+            graph (str, optional): Network backend, 'array' (ArrayDiGraph) or
+                                   'networkx' (networkx.DiGraph). Defaults to 'array'.
+            rng (RandomPool, optional): Random number source of the run.
+                                        Defaults to a freshly seeded one.
         """
+        self.rng = default_pool(rng)  # Random stream of the run
         self.p = .5  # Default activity probability
         self.n = n   # Number of users
         self.m = m   # Number of edges
         
         # Initialize user screen sizes (activity levels) - random integers 2-9
-        self.l = np.random.randint(2, 10, n)
+        self.l = self.rng.integers(2, 10, n)
         
         # Create initial network structure
-        self.G = random_graph_revised(self.n,self.m) 
+        if graph == "array":
+            self.G = ArrayDiGraph.from_edges(self.n, random_edge_list(self.n, self.m, self.rng))
+        elif graph == "networkx":
+            self.G = random_graph_revised(self.n,self.m, self.rng)
+        else:
+            raise ValueError(f"Unknown graph backend: {graph}")
         
         # Initialize user opinions uniformly between -1 and 1
-        self.O = np.random.uniform(-1, 1, self.n)
+        self.O = self.rng.uniform(-1, 1, self.n)
         
         # Initialize data storage
-        self.Opinions_db = {"Time_0": copy.deepcopy(self.O)}  # Opinion history
-        self.Message_db = pd.DataFrame(columns = ["original_poster", "rt_poster","content", "rt_status"])
-        self.Message_db["rt_status"] = self.Message_db["rt_status"].astype(bool)
-        self.Network_db = {"Time_0": list(self.G.edges())}  # Network history
-        self.ME_db = pd.DataFrame(columns = ["uid", "Time", "index", "effects"])  # Media effects
-        self.ME_db["effects"] = self.ME_db["effects"].astype(bool)
+        self.Opinions_db = OpinionHistory(self.O)  # Opinion history
+        self.messages = MessageStore(n)  # Message history
+        # Screens show up to l + 2 messages, recommendations the last RECOMMEND
+        self.messages.reach = max(int(self.l.max()) + 2, User.RECOMMEND)
+        self.Network_db = NetworkHistory(self.G)  # Network history
+        self.effects = EventLog({"uid": np.int32, "Time": np.int64,
+                                 "index": np.int64, "effects": bool})  # Media effects
+        self.edge_changes = []  # Network changes not yet recorded
 
         
     def screen_size(self, uid):
@@ -145,8 +188,27 @@ class SocialMedia:
         Returns:
             int: Number of messages the user will see (screen size)
         """
-        l = self.l[uid] + np.random.randint(-2, 3)  # Base size + random variation
+        l = self.l[uid] + self.rng.integers(-2, 3)  # Base size + random variation
         return l
+
+    @property
+    def Message_db(self):
+        """All messages as a DataFrame (built on access, use for export only).
+
+        Returns:
+            pd.DataFrame: Messages with columns
+                          ['original_poster', 'rt_poster', 'content', 'rt_status']
+        """
+        return self.messages.to_frame()
+
+    @property
+    def ME_db(self):
+        """All recorded media effects as a DataFrame (built on access, use for export only).
+
+        Returns:
+            pd.DataFrame: Effects with columns ['uid', 'Time', 'index', 'effects']
+        """
+        return self.effects.to_frame()
             
     def make_screen(self, uid, l, sub, include_media = True):
         """Create user's message screen based on their network and subscriptions.
@@ -161,21 +223,29 @@ class SocialMedia:
             include_media (bool, optional): Include media messages. Defaults to True.
             
         Returns:
-            pd.DataFrame or None: DataFrame of messages if any exist, None otherwise
+            np.ndarray or None: Positions of the screen's messages in ``messages``
+                                if any exist, None otherwise
         """
         friends = list(self.G.successors(uid))
         if include_media:
             friends = friends + sub
         
-        # Filter messages from followed users/media
-        repost_by_friend = self.Message_db.rt_poster.isin(friends)
-        screen = self.Message_db[repost_by_friend].tail(l)
+        # Most recent messages from followed users/media
+        screen = self.messages.recent(friends, l)
         
         if len(screen) > 0:
             return screen
         else:
             return None
         
+    def opinions(self):
+        """Get the current opinions of all users.
+        
+        Returns:
+            np.ndarray: Live opinion vector (do not modify)
+        """
+        return self.O
+
     def get_recent_o(self, uid):
         """Get user's current opinion.
         
@@ -194,7 +264,7 @@ class SocialMedia:
             uid (int): User ID
             
         Returns:
-            networkx view: Iterator of users that uid follows
+            iterable: Users that uid follows
         """
         return self.G.successors(uid)
     
@@ -206,6 +276,7 @@ class SocialMedia:
             new_fri (int): User to be followed
         """
         self.G.add_edge(uid, new_fri)
+        self.edge_changes.append((uid, new_fri, NetworkHistory.ADD))
 
     def remove_edge(self, uid, foe_target):
         """Remove a following relationship.
@@ -215,17 +286,30 @@ class SocialMedia:
             foe_target (int): User to be unfollowed
         """
         self.G.remove_edge(uid, foe_target)
+        self.edge_changes.append((uid, foe_target, NetworkHistory.REMOVE))
         
     def add_message(self, message):
         """Add a new message to the platform.
         
         Args:
-            message (pd.DataFrame): Message data with columns:
-                                  ['original_poster', 'rt_poster', 'content', 'rt_status']
+            message (tuple or None): Message as (original_poster, rt_poster,
+                                     content, rt_status); None is ignored
+        """
+        if message is not None:
+            self.messages.append(*message)
+
+    def update_opinion(self, uid, new_o):
+        """Update user's current opinion.
+        
+        Args:
+            uid (int): User ID
+            new_o (float or None): New opinion value, or None if no change
         """
-        self.Message_db = pd.concat([self.Message_db, message], ignore_index = True, axis = 0)
+        if new_o:
+            self.O[uid] = new_o
+
     def update_Opinions_db(self, uid, new_o, t):
-        """Update user's opinion and record in database.
+        """Record user's opinion change in the opinion history.
         
         Args:
             uid (int): User ID
@@ -233,18 +317,19 @@ class SocialMedia:
             t (int): Current time step
         """
         if new_o:
-            self.O[uid] = new_o
-        self.Opinions_db["Time_"+str(t+1)] = copy.deepcopy(self.O)
+            self.Opinions_db.record(t+1, uid, new_o)
+        else:
+            self.Opinions_db.record(t+1)
 
     def update_Network_db(self, t):
-        """Record current network structure.
+        """Record this step's network changes.
         
         Args:
             t (int): Current time step
         """
-        self.Network_db["Time_"+str(t+1)] = copy.deepcopy(list(self.G.edges())) 
+        self.Network_db.record(t+1, self.G, self.edge_changes)
     
-    def update_ME_db(self, t, uid, fri, foe):
+    def update_ME_db(self, t, uid, fri, foe, media_only = False, log = None):
         """Record media effects for analysis.
         
         Tracks which messages had positive (fri) or negative (foe) effects
@@ -253,24 +338,15 @@ class SocialMedia:
         Args:
             t (int): Current time step
             uid (int): User ID
-            fri (pd.DataFrame or None): Messages that had positive influence
-            foe (pd.DataFrame or None): Messages that had negative influence
+            fri (np.ndarray or None): Positions of messages that had positive influence
+            foe (np.ndarray or None): Positions of messages that had negative influence
+            media_only (bool, optional): Only record messages originally posted
+                                         by a media system. Defaults to False.
+            log (EventLog, optional): Log to append to. Defaults to ``effects``.
         """
-        if fri is not None:
-            fri = fri.reset_index()
-            fri["effects"] = True 
-            fri["uid"] = uid
-            fri["Time"] = t + 1
-            fri_record = fri[["uid", "Time", "index", "effects"]]
-            self.ME_db = pd.concat([self.ME_db, fri_record], axis= 0, ignore_index=True)
-            
-        if foe is not None:
-            foe = foe.reset_index()
-            foe["effects"] = False
-            foe["uid"] = uid
-            foe["Time"] = t + 1 
-            foe_record = foe[["uid", "Time", "index", "effects"]]
-            self.ME_db = pd.concat([self.ME_db, foe_record], ignore_index= True)
-        
-        
-           
+        log = self.effects if log is None else log
+        for msgs, effect in [(fri, True), (foe, False)]:
+            if msgs is not None:
+                if media_only:
+                    msgs = msgs[is_media(self.messages.original_poster[msgs], self.n)]
+                log.extend(len(msgs), uid, t + 1, self.messages.position(msgs), effect)
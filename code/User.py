@@ -13,11 +13,35 @@ The User class represents individual agents that:
 
 Classes:
     User: Individual user/agent in the simulation
+
+Functions:
+    classify_screen: Vectorized friend/foe classification of a screen
 """
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import numpy as np, pandas as pd
+import numpy as np
+from ids import is_media
+
+def classify_screen(content, o, eta, miu):
+    """Vectorized friend/foe classification and social influence of a screen.
+    
+    Args:
+        content (np.ndarray): Content of the messages on the screen
+        o (float): Opinion of the viewing user
+        eta (float): Tolerance threshold for opinion similarity
+        miu (float): Strength of social influence
+        
+    Returns:
+        tuple: (close, influence) where close flags friendly messages and
+               influence is miu times their mean opinion difference
+               (None if no message is friendly)
+    """
+    diff = content - o
+    close = np.abs(diff) < eta
+    if close.any():
+        return close, miu * diff[close].mean()
+    return close, None
 
 class User():
     """Individual User Agent for Social Media Simulation.
@@ -26,18 +50,28 @@ class User():
     Users have opinions, social connections, media subscriptions, and
     exhibit various behaviors like posting, following, and opinion updating.
     
+    A User is a lightweight per-step view on the platform state (opinions
+    and screen sizes live in SocialMedia's arrays, followees in its graph).
+    The exclusion set ``me_fri_subs`` is only built when it is first used,
+    i.e. on the rewiring path.
+    
     Attributes:
         uid (int): Unique user identifier
         eta (float): Tolerance threshold for opinion similarity
         miu (float): Strength of social influence on opinion updates
         o (float): Current opinion value (-1 to 1)
-        G (networkx.DiGraph): Social network graph
-        f (networkx view): Users that this user follows
+        G (ArrayDiGraph or networkx.DiGraph): Social network graph
+        f (iterable): Users that this user follows
         subs (list): Media subscriptions
-        mids (list): Available media system IDs
+        mids (list): Available media system IDs (following the user IDs)
+        messages (MessageStore): All platform messages
+        rng (RandomPool): Random stream of the run
         me_fri_subs (set): Combined set of self, friends, and subscriptions
     """
-    def __init__(self, uid, eta, miu, o, G, subs, mids):
+    RECOMMEND = 21  # Recent messages considered by friend recommendation
+    __slots__ = ("uid", "eta", "miu", "o", "G", "subs", "mids", "messages", "rng", "_me_fri_subs")
+
+    def __init__(self, uid, eta, miu, o, G, subs, mids, messages, rng):
         """Initialize a user agent.
         
         Args:
@@ -45,93 +79,112 @@ class User():
             eta (float): Tolerance threshold for opinion similarity (0-1)
             miu (float): Strength of social influence (0-1)
             o (float): Initial opinion value (-1 to 1)
-            G (networkx.DiGraph): Social network graph
+            G (ArrayDiGraph or networkx.DiGraph): Social network graph
             subs (list): Current media subscriptions
             mids (list): Available media system IDs
+            messages (MessageStore): All platform messages
+            rng (RandomPool): Random number source of the run
         """
         self.uid = uid
         self.eta = eta    # Tolerance threshold
         self.miu = miu    # Social influence strength
         self.o = o        # Current opinion
         self.G = G        # Network graph
-        self.f = self.G.successors(uid)  # Users this user follows
         self.subs = subs  # Media subscriptions
         self.mids = mids  # Available media systems
-        
-        # Combined set for filtering (self + friends + subscriptions)
-        self.me_fri_subs = set(self.f).union({self.uid}).union(self.subs)
+        self.messages = messages  # Platform message store
+        self.rng = rng  # Random stream of the run
+        self._me_fri_subs = None
+
+    @property
+    def f(self):
+        """Users this user follows."""
+        return self.G.successors(self.uid)
 
+    @property
+    def me_fri_subs(self):
+        """Combined set for filtering (self + friends + subscriptions).
+
+        Built on first access and then kept, so it reflects the followees
+        at that moment even if the user unfollows someone afterwards.
+        """
+        if self._me_fri_subs is None:
+            self.snapshot_exclusions()
+        return self._me_fri_subs
+
+    def snapshot_exclusions(self):
+        """Fix ``me_fri_subs`` to the current followees and subscriptions.
+
+        Called before unfollowing, so the unfollowed source is still
+        excluded when a new friend is picked.
+        """
+        self._me_fri_subs = set(self.f).union({self.uid}).union(self.subs)
+
+
+    def classify(self, screen):
+        """Split a screen into friendly and hostile messages in one pass.
+        
+        Messages are 'friendly' if their content is within the user's
+        tolerance threshold of their current opinion and 'hostile' otherwise.
+        
+        Args:
+            screen (np.ndarray or None): Positions of the messages visible to the user
+            
+        Returns:
+            tuple: (fri, foe, influence) where fri/foe are message positions
+                   (None if empty) and influence is the social influence of
+                   the friendly messages (None if there are none)
+        """
+        if screen is None:
+            return None, None, None
+        close, influence = classify_screen(self.messages.content[screen], self.o, self.eta, self.miu)
+        fri = screen[close]
+        foe = screen[~close]
+        return (fri if len(fri) > 0 else None,
+                foe if len(foe) > 0 else None,
+                influence)
 
     def find_fri(self, screen):
         """Identify messages from similar-minded users/media (friends).
         
-        Messages are considered 'friendly' if their content is within the
-        user's tolerance threshold of their current opinion.
-        
         Args:
-            screen (pd.DataFrame or None): Messages visible to the user
+            screen (np.ndarray or None): Positions of the messages visible to the user
             
         Returns:
-            pd.DataFrame or None: Messages from similar-minded sources
+            np.ndarray or None: Positions of messages from similar-minded sources
         """
-        if screen is not None:
-            # Calculate opinion similarity
-            screen["fri_or_foe"] = np.where(
-                np.abs(screen.content.values - self.o) < self.eta, 
-                True, False
-            )
-            fri = screen[screen.fri_or_foe == True]
-            if len(fri) > 0:
-                return fri
-            else:
-                return None
+        return self.classify(screen)[0]
     
     def find_foe(self, screen):
         """Identify messages from dissimilar users/media (foes).
         
-        Messages are considered 'hostile' if their content is outside the
-        user's tolerance threshold of their current opinion.
-        
         Args:
-            screen (pd.DataFrame or None): Messages visible to the user
+            screen (np.ndarray or None): Positions of the messages visible to the user
             
         Returns:
-            pd.DataFrame or None: Messages from dissimilar sources
+            np.ndarray or None: Positions of messages from dissimilar sources
         """
-        if screen is not None:
-            # Calculate opinion dissimilarity
-            screen["fri_or_foe"] = np.where(
-                np.abs(screen.content.values - self.o) < self.eta, 
-                True, False
-            )
-            foe = screen[screen.fri_or_foe == False]
-            if len(foe) > 0:
-                return foe
-            else:
-                return None
+        return self.classify(screen)[1]
  
-    def update_opinion(self, fri, rand):
+    def update_opinion(self, influence, rand):
         """Update user's opinion based on social influence and noise.
         
         Opinion change is based on the average opinion difference from
         friendly messages, scaled by social influence strength, plus noise.
         
         Args:
-            fri (pd.DataFrame or None): Messages from similar-minded sources
+            influence (float or None): Social influence from ``classify``
             rand (float): Noise level in opinion updates
             
         Returns:
             float or None: New opinion value, or None if no update
         """
-        if fri is not None:
-            # Calculate social influence from friendly messages
-            social_influence = self.miu * np.mean(fri.content - self.o)
-            
+        if influence is not None:
             # Add random noise
-            noise = (np.random.random() * 2 - 1) * rand
+            noise = (self.rng.random() * 2 - 1) * rand
             
             # Calculate new opinion
-            new_opinion = self.o + social_influence + noise
+            new_opinion = self.o + influence + noise
             
             return new_opinion
 
@@ -142,29 +195,21 @@ class User():
         Otherwise, they create an original post expressing their opinion.
         
         Args:
-            fri (pd.DataFrame or None): Messages from similar-minded sources
+            fri (np.ndarray or None): Positions of messages from similar-minded sources
             p (float, optional): Probability of reposting. Defaults to 0.5.
             
         Returns:
-            pd.DataFrame: Generated message data
+            tuple or None: Generated message as (original_poster, rt_poster,
+                           content, rt_status), or None if nothing is posted
         """
-        if np.random.random() < p:
+        if self.rng.random() < p:
             if fri is not None:
                 # Repost a friendly message
-                rt = fri.sample(1)
-                rt["rt_poster"] = self.uid
-                rt["rt_status"] = True
-                rt.drop(["fri_or_foe"], axis=1, inplace=True)
-                return rt    
+                rt = fri[self.rng.integers(len(fri))]
+                return (int(self.messages.original_poster[rt]), self.uid, self.messages.content[rt], True)
         else:
             # Create original post with current opinion
-            self_tw = pd.DataFrame({
-                "original_poster": [self.uid], 
-                "rt_poster": [self.uid], 
-                "content": [self.o], 
-                "rt_status": [False]
-            })
-            return self_tw
+            return (self.uid, self.uid, self.o, False)
 
     def screen_candidates(self, candidates, output="mix"):
         """Filter and select from candidate users/media for following.
@@ -175,22 +220,21 @@ class User():
                                   Defaults to 'mix'.
                                   
         Returns:
-            int or str or None: Selected target ID, or None if no candidates
+            int or None: Selected target ID, or None if no candidates
         """
         if candidates is not None and len(candidates) > 0:
+            n = self.messages.n
             if output == "agent":
                 # Filter for user agents only (no media)
-                candidates = [int(i) for i in candidates if str(i)[0] != "m"]
+                candidates = [i for i in candidates if not is_media(i, n)]
             elif output == "media":
                 # Filter for media systems only
-                candidates = [i for i in candidates if str(i)[0] == "m"]
+                candidates = [i for i in candidates if is_media(i, n)]
+            else:
+                candidates = list(candidates)
             
             if len(candidates) > 0:
-                target = np.random.choice(list(candidates))
-                # Convert to int if it's a user agent
-                if str(target)[0] != "m":
-                    target = int(target)
-                return target
+                return int(candidates[self.rng.integers(0, len(candidates))])
 
     
     def friend_repost(self, fri, output="mix"): 
@@ -200,41 +244,76 @@ class User():
         following them if not already connected.
         
         Args:
-            fri (pd.DataFrame or None): Friendly messages
+            fri (np.ndarray or None): Positions of friendly messages
             output (str, optional): Type filter. Defaults to 'mix'.
             
         Returns:
-            int or str or None: Selected target to follow
+            int or None: Selected target to follow
         """
         if fri is not None:
             # Get original posters excluding already connected users
-            original_posters = set(fri.original_poster.values) - self.me_fri_subs
+            original_posters = set(self.messages.original_poster[fri].tolist()) - self.me_fri_subs
             candidate = self.screen_candidates(original_posters, output=output)
             return candidate
         
-    def friend_recommend(self, Message_db, output="mix"):
+    def friend_recommend(self, messages, output="mix"):
         """Find new connections from recent friendly messages.
         
         Looks at recent messages from non-connected users and considers
         following those with similar opinions.
         
         Args:
-            Message_db (pd.DataFrame): All messages on the platform
+            messages (MessageStore): All messages on the platform
             output (str, optional): Type filter. Defaults to 'mix'.
             
         Returns:
-            int or str or None: Selected target to follow
+            int or None: Selected target to follow
         """
         # Get recent messages from non-connected users (last 21 messages)
-        recent = Message_db[~Message_db.rt_poster.isin(self.me_fri_subs)].tail(21)
+        recent = messages.recent_excluding(self.me_fri_subs, self.RECOMMEND)
         
         if len(recent) > 0:
             # Find friendly messages among recent posts
             recommend = self.find_fri(recent)
             if recommend is not None and len(recommend) > 0:
-                candidate = self.screen_candidates(recommend.rt_poster, output=output)
+                candidate = self.screen_candidates(messages.rt_poster[recommend].tolist(), output=output)
                 return candidate
 
+    def sample_candidate(self, output="mix", max_tries=32):
+        """Draw a target uniformly among users/media not yet connected.
+        
+        Draws from the agents (0..n-1), the media (n..), or both, and rejects
+        draws that fall in ``me_fri_subs``. This costs O(1) expected draws
+        as long as most targets are still available; when the user already
+        follows at least half of them (or max_tries draws are rejected) the
+        allowed targets are enumerated exactly instead. Both ways give the
+        same uniform distribution.
+        
+        Args:
+            output (str, optional): Type filter - 'agent', 'media', or 'mix'.
+                                  Defaults to 'mix'.
+            max_tries (int, optional): Rejection draws before enumerating.
+                                       Defaults to 32.
+                                       
+        Returns:
+            int or None: Selected target, or None if every target is excluded
+        """
+        n = self.messages.n
+        start = n if output == "media" else 0
+        stop = n if output == "agent" else n + len(self.mids)
+        pool = stop - start
+        exclude = self.me_fri_subs
+        
+        if pool > 2 * len(exclude):
+            for _ in range(max_tries):
+                target = start + int(self.rng.integers(0, pool))
+                if target not in exclude:
+                    return target
+                    
+        candidates = [i for i in range(start, stop) if i not in exclude]
+        if len(candidates) > 0:
+            return candidates[self.rng.integers(0, len(candidates))]
+
     def friend_random(self, output="mix"):
         """Randomly select a new connection from all available users/media.
         
@@ -244,15 +323,14 @@ class User():
             output (str, optional): Type filter. Defaults to 'mix'.
             
         Returns:
-            int or str or None: Selected target to follow
+            int or None: Selected target to follow
         """
-        # Get all non-connected users and media
-        non_friends = list(set(self.G.nodes).union(set(self.mids)) - self.me_fri_subs)
-        candidate = self.screen_candidates(non_friends, output=output)
+        # Uniform draw among non-connected users and/or media
+        candidate = self.sample_candidate(output=output)
         
         # Fallback for media-only selection if no candidates found
         if candidate is None and output == "media":
-            return np.random.choice(self.mids)
+            return int(self.rng.choice(self.mids))
         else:
             return candidate
 
@@ -264,16 +342,16 @@ class User():
         content that conflicts with the user's opinion.
         
         Args:
-            foe (pd.DataFrame or None): Hostile/dissimilar messages
+            foe (np.ndarray or None): Positions of hostile/dissimilar messages
             
         Returns:
-            int or str or None: Target to unfollow
+            int or None: Target to unfollow
         """
         if foe is not None and len(foe) > 0:
-            target_foe = np.random.choice(foe["rt_poster"])
+            target_foe = int(self.rng.choice(self.messages.rt_poster[foe]))
             return target_foe
     
-    def find_friend(self, fri, Message_db, output, print_method=False):
+    def find_friend(self, fri, messages, output, print_method=False):
         """Find a new user/media to follow using multiple strategies.
         
         Tries three methods in order:
@@ -282,13 +360,13 @@ class User():
         3. Random selection from available targets (random method)
         
         Args:
-            fri (pd.DataFrame or None): Friendly messages
-            Message_db (pd.DataFrame): All platform messages
+            fri (np.ndarray or None): Positions of friendly messages
+            messages (MessageStore): All platform messages
             output (str): Type filter - 'agent', 'media', or 'mix'
             print_method (bool, optional): Print debugging info. Defaults to False.
             
         Returns:
-            int or str or None: Selected target to follow
+            int or None: Selected target to follow
         """
         new_friend = None
         method = None
@@ -300,7 +378,7 @@ class User():
             
         # Strategy 2: Follow recent similar-minded posters
         if new_friend is None:
-            new_friend = self.friend_recommend(Message_db, output=output)
+            new_friend = self.friend_recommend(messages, output=output)
             method = "recommend"
             
         # Strategy 3: Random selection
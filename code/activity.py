@@ -20,10 +20,10 @@ Functions:
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import numpy as np
 from User import User
+from ids import is_media
 
-def send_media_message(sm, md, Os, include_media=True):
+def send_media_message(sm, md, include_media=True):
     """Generate and post messages from mass media systems.
     
     Each media system has a chance to post content based on the current
@@ -32,15 +32,11 @@ def send_media_message(sm, md, Os, include_media=True):
     Args:
         sm (SocialMedia): Social media platform instance
         md (MassMedia): Mass media systems instance
-        Os (np.ndarray): Current opinion state of all users
         include_media (bool, optional): Whether to include media. Defaults to True.
     """
     if include_media:
-        for mid in md.mids:
-            # Each media system attempts to generate a message
-            ms = md.media_message(mid, Os)
-            if ms is not None:
-                sm.add_message(ms) 
+        for ms in md.media_messages():
+            sm.add_message(ms) 
 
 def sample_user(sm):
     """Randomly select a user for activity and determine their screen size.
@@ -51,7 +47,7 @@ def sample_user(sm):
     Returns:
         tuple: (user_id, screen_size) or (None, 0) if user inactive
     """
-    uid = np.random.randint(sm.n)
+    uid = int(sm.rng.integers(sm.n))
     l = sm.screen_size(uid)
     
     if l == 0:
@@ -83,22 +79,20 @@ def user_activity(uid, sm, md, eta, miu, l, subs, rand, include_media):
     Returns:
         tuple: (user_instance, friendly_messages, hostile_messages, new_opinion, new_post)
     """
-    # Get user's current opinion and subscriptions
+    # Get user's current opinion
     o = sm.get_recent_o(uid)
-    subs = md.find_subs(uid)
     
     # Create user instance
-    user = User(uid, eta, miu, o, sm.G, subs, md.mids)
+    user = User(uid, eta, miu, o, sm.G, subs, md.mids, sm.messages, sm.rng)
     
     # Generate personalized content screen
     screen = sm.make_screen(user.uid, l, user.subs, include_media=include_media)
     
-    # Categorize content as friendly or hostile
-    fri = user.find_fri(screen)
-    foe = user.find_foe(screen)
+    # Categorize content as friendly or hostile in a single pass
+    fri, foe, influence = user.classify(screen)
     
     # Update opinion based on social influence
-    new_o = user.update_opinion(fri, rand=rand)
+    new_o = user.update_opinion(influence, rand=rand)
     
     # Generate new content
     new_post = user.generate_post(fri)
@@ -116,24 +110,28 @@ def update_network(user, prob_rewire, fri, foe, md, sm, mix=False):
     Args:
         user (User): User instance
         prob_rewire (float): Probability of network rewiring (0-1)
-        fri (pd.DataFrame or None): Friendly messages
-        foe (pd.DataFrame or None): Hostile messages
+        fri (np.ndarray or None): Positions of friendly messages
+        foe (np.ndarray or None): Positions of hostile messages
         md (MassMedia): Mass media systems instance
         sm (SocialMedia): Social media platform instance
         mix (bool, optional): Allow cross-cutting exposure. Defaults to False.
     """
-    if np.random.random() < prob_rewire: 
+    if user.rng.random() < prob_rewire: 
         if foe is not None:
+            # Snapshot current followees/subscriptions before unfollowing,
+            # so the unfollowed source is not picked again as a new friend
+            user.snapshot_exclusions()
+            
             # Select a target to unfollow from hostile sources
             foe_target = user.find_unfriend(foe)
             
-            if str(foe_target)[0] == "m":
+            if is_media(foe_target, sm.n):
                 # Unfollowing a media system
                 md.cancel(user.uid, foe_target)
                 
                 if not mix:
                     # Homophilic rewiring: replace with similar media
-                    fri_target = user.find_friend(fri, sm.Message_db, output="media")
+                    fri_target = user.find_friend(fri, sm.messages, output="media")
                     md.subscribe(user.uid, fri_target)
             else:
                 # Unfollowing a user
@@ -141,13 +139,13 @@ def update_network(user, prob_rewire, fri, foe, md, sm, mix=False):
                 
                 if not mix:
                     # Homophilic rewiring: replace with similar user
-                    fri_target = user.find_friend(fri, sm.Message_db, output="agent")
+                    fri_target = user.find_friend(fri, sm.messages, output="agent")
                     sm.add_edge(user.uid, fri_target)
                     
             if mix:
                 # Cross-cutting rewiring: can replace with any type
-                fri_target = user.find_friend(fri, sm.Message_db, output="mix", print_method=False)
-                if str(fri_target)[0] == "m":
+                fri_target = user.find_friend(fri, sm.messages, output="mix", print_method=False)
+                if is_media(fri_target, sm.n):
                     md.subscribe(user.uid, fri_target)
                 else:
                     sm.add_edge(user.uid, fri_target)
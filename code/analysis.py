@@ -2,7 +2,7 @@ import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
 from sim import sim
 #from Media import mass_media
-import numpy as np, pandas as pd, json as js, csv
+import numpy as np, json as js, csv
 from tqdm import tqdm, tgrange
 #from itertools import product
 
@@ -44,13 +44,10 @@ for s, eta in paras:
        # with open(cwd + "/Meta/config.txt", "a") as f:
             #js.dump({i: sm.Config_db}, f)
             #f.write("\n")
-        sm.Message_db.original_poster = sm.Message_db.original_poster.astype(str)
-        sm.Message_db.rt_poster = sm.Message_db.rt_poster.astype(str)
-        sm.Message_db.to_parquet(cwd + "/Messages/"+ lab + ".parquet")
-        pd.DataFrame(sm.Opinions_db).to_parquet(cwd + "/Opinions/"+ lab + ".parquet")
+        messages = sm.messages.to_frame()
+        messages.to_parquet(cwd + "/Messages/"+ lab + ".parquet")
+        sm.Opinions_db.to_frame().to_parquet(cwd + "/Opinions/"+ lab + ".parquet")
         sm.ME_db.to_parquet(cwd + "/Effects/"+ lab + ".parquet")
-        with open(cwd + "/Subscription/"+lab + ".json", "a") as f:
-            js.dump(md.Subs_db, f, cls=NumpyEncoder)
-        with open(cwd + "/Networks/{}.json".format(lab), "w") as f:
-                js.dump(sm.Network_db, f)
+        md.Subs_db.to_frame().to_parquet(cwd + "/Subscription/"+ lab + ".parquet")
+        sm.Network_db.to_frame().to_parquet(cwd + "/Networks/"+ lab + ".parquet")
 
@@ -1,6 +1,6 @@
 from sim import sim
 #from Media import mass_media
-import os, numpy as np, pandas as pd, json as js, csv
+import os, numpy as np, csv
 from tqdm import tqdm, tgrange
 
 
@@ -25,11 +25,10 @@ for i in tqdm(range(REP), desc= "Repitition"):
     with open(cwd + "/Meta/screen_size.csv", "a") as f:
         writer = csv.writer(f, delimiter=',')
         writer.writerow(sm.l)
-    sm.Message_db.to_parquet(cwd + "/Messages/"+ lab + ".parquet")
-    pd.DataFrame(sm.Opinions_db).to_parquet(cwd + "/Opinions/"+ lab + ".parquet")
+    sm.messages.to_frame().to_parquet(cwd + "/Messages/"+ lab + ".parquet")
+    sm.Opinions_db.to_frame().to_parquet(cwd + "/Opinions/"+ lab + ".parquet")
     sm.ME_db.to_parquet(cwd + "/Effects/"+ lab + ".parquet")
-    with open(cwd + "/Networks/{}.json".format(lab), "w") as f:
-            js.dump(sm.Network_db, f)
+    sm.Network_db.to_frame().to_parquet(cwd + "/Networks/"+ lab + ".parquet")
 
 
 
@@ -0,0 +1,62 @@
+"""Checkpoint Module for Agent-Based Media Effects Simulation.
+
+This module saves and restores the complete state of a running simulation
+so that long runs can be split across jobs. A checkpoint holds the next
+time step, the parameters of the run, the social media platform (network,
+opinions, messages and histories), the mass media systems (subscriptions
+and audience sums), the recorders and the random stream, including the
+unused part of its pre-drawn pool, so a resumed run continues exactly as
+the uninterrupted one would have.
+
+Functions:
+    save_checkpoint: Atomically write the simulation state to disk
+    load_checkpoint: Read a simulation state written by save_checkpoint
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import pickle
+
+def save_checkpoint(path, t, params, sm, md, recorders):
+    """Atomically write the simulation state to disk.
+
+    The state is written to a temporary file that replaces ``path`` once
+    complete, so a job killed while writing leaves the previous checkpoint.
+
+    Args:
+        path (str): Checkpoint file
+        t (int): Next time step to simulate
+        params (dict): Parameters of the run
+        sm (SocialMedia): Social media platform instance
+        md (MassMedia): Mass media systems instance
+        recorders (list): Recorders of the run
+    """
+    state = {"t": t, "params": params, "sm": sm, "md": md, "recorders": recorders}
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+def load_checkpoint(path, params = None):
+    """Read a simulation state written by ``save_checkpoint``.
+
+    Args:
+        path (str): Checkpoint file
+        params (dict, optional): Parameters of the run to resume; checked
+                                 against those stored in the checkpoint.
+                                 Defaults to None (no check).
+
+    Returns:
+        tuple: (t, sm, md, recorders) with t the next time step to simulate
+
+    Raises:
+        ValueError: If the checkpoint was written with other parameters
+    """
+    with open(path, "rb") as f:
+        state = pickle.load(f)
+    if params is not None:
+        changed = {k: (state["params"].get(k), v) for k, v in params.items()
+                   if state["params"].get(k) != v}
+        if changed:
+            raise ValueError(f"Checkpoint {path} was written with other parameters "
+                             f"(checkpoint, requested): {changed}")
+    return state["t"], state["sm"], state["md"], state["recorders"]
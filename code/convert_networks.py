@@ -0,0 +1,148 @@
+"""Network Archive Converter for Agent-Based Media Effects Simulation.
+
+Older versions of ``run.run`` saved the follow network as a JSON file per
+iteration, ``networks/{i}_networks.json``, holding the full edge list of
+every time step ({"Time_t": [[source, target], ...]}). This module converts
+such files into the compact edge-event Parquet table written by
+``NetworkHistory.to_frame`` (the initial edges plus one row per added or
+removed edge). The JSON is read one time step at a time, every converted
+file is checked against its source before it is kept, and a folder tree
+of files can be converted on a pool of worker processes.
+
+The JSON files are parsed by ``History.iter_json_networks`` and
+``NetworkHistory.from_json``, so ``History.load_networks`` reads either
+format.
+
+Functions:
+    verify: Check that a converted file holds the same networks as its source
+    convert_file: Convert one JSON network file to Parquet
+    convert: Convert many JSON network files on a process pool
+
+Usage:
+    python convert_networks.py <folder or file> [...] [--workers W] [--delete]
+
+Example:
+    python convert_networks.py /N/slate/harryan/sim_data --workers 64 --delete
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import sys, traceback, glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from History import NetworkHistory, iter_json_networks, load_networks
+import argparse
+
+def verify(json_path, parquet_path):
+    """Check that a converted file holds the same networks as its source.
+
+    Edge sets are compared at every time step stored in the JSON file
+    (the order of edges within a step is not kept by the conversion).
+
+    Args:
+        json_path (str): Path to the legacy JSON file
+        parquet_path (str): Path to the converted Parquet file
+
+    Returns:
+        bool: Whether every stored time step matches
+    """
+    history = load_networks(parquet_path)
+    replay = history.replay()
+    t_replay, G = next(replay)
+    for t, edges in iter_json_networks(json_path):
+        while t_replay < t:
+            t_replay, G = next(replay, (None, None))
+            if t_replay is None:
+                return False
+        if t_replay != t or set(G.edges()) != set(edges):
+            return False
+    return t_replay == history.T
+
+def convert_file(json_path, delete = False):
+    """Convert one JSON network file to ``{i}_networks.parquet`` next to it.
+
+    The Parquet file is written under a temporary name, verified against
+    the JSON and only then renamed, so a failed conversion leaves no file.
+
+    Args:
+        json_path (str): Path to the legacy JSON file
+        delete (bool, optional): Remove the JSON file once the conversion is
+                                 verified. Defaults to False.
+
+    Returns:
+        tuple: (JSON size, Parquet size) in bytes
+
+    Raises:
+        ValueError: If the converted file does not match the JSON file
+    """
+    parquet_path = json_path[:-len(".json")] + ".parquet"
+    history = NetworkHistory.from_json(json_path)
+    history.to_frame().to_parquet(parquet_path + ".tmp", engine="pyarrow", compression="zstd")
+    if not verify(json_path, parquet_path + ".tmp"):
+        os.remove(parquet_path + ".tmp")
+        raise ValueError(f"Converted networks do not match {json_path}")
+    os.replace(parquet_path + ".tmp", parquet_path)
+    sizes = (os.path.getsize(json_path), os.path.getsize(parquet_path))
+    if delete:
+        os.remove(json_path)
+    return sizes
+
+def convert(paths, workers = 1, delete = False):
+    """Convert JSON network files on a pool of worker processes.
+
+    Folders are searched recursively for ``*_networks.json`` files. A
+    failing file is reported and does not stop the others.
+
+    Args:
+        paths (list): JSON files and/or folders
+        workers (int, optional): Number of worker processes; 1 converts in
+                                 this process. Defaults to 1.
+        delete (bool, optional): Remove each JSON file once its conversion is
+                                 verified. Defaults to False.
+
+    Returns:
+        tuple: (files that failed, total JSON bytes, total Parquet bytes)
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(f"{path}/**/*_networks.json", recursive=True))
+        else:
+            files.append(path)
+    failed, json_bytes, parquet_bytes = [], 0, 0
+    if workers == 1:
+        for file in files:
+            try:
+                j, p = convert_file(file, delete)
+                json_bytes, parquet_bytes = json_bytes + j, parquet_bytes + p
+            except Exception:
+                traceback.print_exc()
+                failed.append(file)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(convert_file, file, delete): file for file in files}
+            for future in as_completed(futures):
+                try:
+                    j, p = future.result()
+                    json_bytes, parquet_bytes = json_bytes + j, parquet_bytes + p
+                except Exception:
+                    print(f"Converting {futures[future]} failed:", file=sys.stderr)
+                    traceback.print_exc()
+                    failed.append(futures[future])
+    return sorted(failed), json_bytes, parquet_bytes
+
+if __name__ == '__main__':
+    # Command-line interface for converting legacy network files
+    parser = argparse.ArgumentParser(
+        description='Convert legacy JSON network files to edge-event Parquet files')
+    parser.add_argument('paths', nargs='+', help='JSON network files or folders to search')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker processes (default: 1)')
+    parser.add_argument('--delete', action='store_true',
+                       help='Remove each JSON file once its conversion is verified')
+    args = parser.parse_args()
+
+    failed, json_bytes, parquet_bytes = convert(args.paths, workers=args.workers, delete=args.delete)
+    print(f"Converted {json_bytes / 1e9:.2f} GB of JSON into {parquet_bytes / 1e9:.2f} GB of Parquet.")
+    if failed:
+        print(f"Failed files: {failed}")
+        sys.exit(1)
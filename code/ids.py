@@ -0,0 +1,53 @@
+"""Identifier Module for Agent-Based Media Effects Simulation.
+
+Users and media systems share a single integer id space: user agents are
+0..n-1 and media system k is n + k. Keeping every poster id an integer lets
+messages, subscriptions and screens use typed int32 arrays throughout; the
+legacy "m{k}" labels for media are only produced on export.
+
+Functions:
+    media_ids: Integer ids of the media systems
+    is_media: Tell media ids apart from user ids
+    to_labels: Vectorized legacy labels of an id array
+"""
+
+import os
+os.environ['OPENBLAS_NUM_THREADS'] = '1'
+import numpy as np
+
+def media_ids(n, N):
+    """Integer ids of the media systems.
+
+    Args:
+        n (int): Number of users
+        N (int): Number of media systems
+
+    Returns:
+        list: Ids n, n+1, ..., n+N-1
+    """
+    return list(range(n, n + N))
+
+def is_media(i, n):
+    """Tell whether an id (or array of ids) refers to a media system.
+
+    Args:
+        i (int or np.ndarray): Poster id(s)
+        n (int): Number of users
+
+    Returns:
+        bool or np.ndarray: True for media ids
+    """
+    return i >= n
+
+def to_labels(ids, n):
+    """Legacy labels of an id array, as strings.
+
+    Args:
+        ids (np.ndarray): Poster ids
+        n (int): Number of users
+
+    Returns:
+        np.ndarray: Object array of labels such as "12" or "m0"
+    """
+    ids = np.asarray(ids)
+    return np.where(ids >= n, np.char.add("m", (ids - n).astype(str)), ids.astype(str)).astype(object)
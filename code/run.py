@@ -5,29 +5,118 @@ It runs multiple iterations of the simulation with the same parameters and
 saves all results in organized directory structures for later analysis.
 
 Functions:
+    iteration_seed: Independent seed sequence of one iteration
+    run_iteration: Run one iteration and save its results
     run: Execute multiple simulation iterations and save results
     
 Usage:
-    python run.py <audience_share> <num_media> <tolerance> <start_iter> <end_iter>
+    python run.py <audience_share> <num_media> <tolerance> <start_iter> <end_iter> [--workers W] [--seed S] [--resume]
     
 Example:
-    python run.py 0.5 3 0.4 0 100  # Run 100 iterations with specified parameters
+    python run.py 0.5 3 0.4 0 100 --workers 64  # Run 100 iterations on 64 cores
 """
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import pandas as pd, json as js
+import sys, traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np, json as js
 from sim import sim
+from Recorder import ParquetRecorder
 import argparse
 
 ROOT_DIR = "/N/slate/harryan/sim_data"
 
-def run(s, N, eta, start, end):
+def iteration_seed(seed, iteration):
+    """Independent seed sequence of one iteration.
+
+    This is child ``iteration`` of ``SeedSequence(seed).spawn``. The stream
+    only depends on the base seed and the iteration number, so a replicate
+    draws the same numbers whichever worker runs it, and a failed replicate
+    can be rerun on its own.
+
+    Args:
+        seed (int): Base seed of the batch
+        iteration (int): Iteration number
+
+    Returns:
+        np.random.SeedSequence: Seed sequence of the iteration
+    """
+    return np.random.SeedSequence(seed, spawn_key=(iteration,))
+
+def run_iteration(s, N, eta, iteration, cwd, seed, resume = False, checkpoint_seconds = 600):
+    """Run one simulation iteration and save its results.
+
+    The run draws all its random numbers from ``iteration_seed(seed, iteration)``.
+    Its histories are streamed to the output files by a ``ParquetRecorder``
+    while it runs and the message store drops written messages that no
+    screen can still show, so memory does not grow with the run; a file
+    only appears at its final path once complete. Its state is checkpointed
+    to ``checkpoints/{iteration}.pkl`` while it runs; the checkpoint is
+    removed once all results are saved.
+
+    Args:
+        s (float): Audience share parameter (0-1)
+        N (int): Number of mass media systems
+        eta (float): Tolerance threshold for opinion similarity (0-1)
+        iteration (int): Iteration number
+        cwd (str): Output directory of the configuration
+        seed (int): Base seed of the batch
+        resume (bool, optional): Continue from the iteration's checkpoint if one
+                                 exists. Defaults to False.
+        checkpoint_seconds (float, optional): Wall-clock seconds between
+                                              checkpoints. Defaults to 600.
+
+    Returns:
+        int: The iteration number
+    """
+    rng = np.random.default_rng(iteration_seed(seed, iteration))
+    checkpoint = f"{cwd}/checkpoints/{str(iteration)}.pkl"
+
+    # Stream opinions, messages, networks, effects (and subscriptions) to disk
+    tables = ParquetRecorder.TABLES if N != 0 else ParquetRecorder.TABLES[:-1]
+    recorder = ParquetRecorder(f"{cwd}/{{table}}/{str(iteration)}_{{table}}.parquet", tables)
+
+    # Run simulation (with or without media)
+    if N != 0:
+        sm, md = sim(s, N, eta, seed=rng, recorders=[recorder], checkpoint=checkpoint,
+                     checkpoint_seconds=checkpoint_seconds, resume=resume)
+    else:
+        sm, md = sim(0, 1, eta, include_media=False, seed=rng, recorders=[recorder],
+                     checkpoint=checkpoint, checkpoint_seconds=checkpoint_seconds, resume=resume)
+    
+    # Save user screen sizes for media simulations
+    if N != 0:
+        path = f"{cwd}/screensizes/{str(iteration)}_screensizes.json"
+        with open(path + ".tmp", "w") as f:
+            js.dump([int(x) for x in sm.l], f)
+        os.replace(path + ".tmp", path)
+    
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return iteration
+
+def _done(N, iteration, cwd):
+    """Whether all results of an iteration are saved (the last file is written last)."""
+    if N != 0:
+        return os.path.exists(f"{cwd}/screensizes/{str(iteration)}_screensizes.json")
+    return os.path.exists(f"{cwd}/effects/{str(iteration)}_effects.parquet")
+
+def run(s, N, eta, start, end, workers = 1, seed = None, resume = False, checkpoint_seconds = 600,
+        restarts = 3):
     """Execute batch simulations and save results.
     
     Runs multiple iterations of the simulation with identical parameters
     and saves all generated data (opinions, messages, networks, effects)
-    in organized directory structures.
+    in organized directory structures. Iterations are spread over a pool
+    of worker processes, each writing its own output files. A failing
+    iteration is reported and does not stop the others. If a worker process
+    dies (e.g. killed for running out of memory), the pool breaks and all of
+    its unfinished iterations are resubmitted to a fresh pool, resuming from
+    their checkpoints. Running iterations are checkpointed, so a killed
+    batch can be rerun with ``resume``: finished iterations are skipped and
+    unfinished ones continue from their last checkpoint.
     
     Args:
         s (float): Audience share parameter (0-1)
@@ -35,62 +124,84 @@ def run(s, N, eta, start, end):
         eta (float): Tolerance threshold for opinion similarity (0-1)
         start (int): Starting iteration number
         end (int): Ending iteration number (exclusive)
+        workers (int, optional): Number of worker processes; 1 runs the
+                                 iterations in this process. Defaults to 1.
+        seed (int, optional): Base seed of the batch. Defaults to fresh
+                              entropy, which is printed so the batch can
+                              be reproduced. Pass the same seed to resume.
+        resume (bool, optional): Skip finished iterations and continue the
+                                 others from their checkpoints. Defaults to False.
+        checkpoint_seconds (float, optional): Wall-clock seconds between
+                                              checkpoints. Defaults to 600.
+        restarts (int, optional): Number of times a broken worker pool is
+                                  replaced; iterations still unfinished after
+                                  that are reported as failed. Defaults to 3.
+        
+    Returns:
+        list: Iteration numbers that failed
         
     Directory Structure:
         ROOT_DIR/N{N}/s{s}eta{eta}/
         ├── messages/     # Message data for each iteration
-        ├── opinions/     # Opinion evolution data
-        ├── networks/     # Network structure evolution
+        ├── opinions/     # Opinion changes (tall t/uid/value table)
+        ├── networks/     # Network edge events (tall t/source/target/op table)
         ├── effects/      # Media effects tracking
         ├── screensizes/  # User activity levels
-        └── subscriptions/ # Media subscription data
+        ├── subscriptions/ # Subscription events (tall t/uid/media/op table)
+        └── checkpoints/  # State of unfinished iterations
     
     Example:
-        >>> run(s=0.5, N=3, eta=0.4, start=0, end=10)
-        # Runs 10 iterations and saves all results
+        >>> run(s=0.5, N=3, eta=0.4, start=0, end=10, workers=4)
+        # Runs 10 iterations on 4 cores and saves all results
     """
     # Create directory structure
     cwd = ROOT_DIR + f"/N{str(N)}/s{str(s)[-1]}eta{str(eta)[-1]}/" 
-    if not os.path.exists(cwd):
-        os.makedirs(cwd, exist_ok=True)
-        for folder in ["messages", "opinions", "networks", "effects", "screensizes", "subscriptions"]:
-            os.makedirs(cwd + folder)
+    for folder in ["messages", "opinions", "networks", "effects", "screensizes", "subscriptions", "checkpoints"]:
+        os.makedirs(cwd + folder, exist_ok=True)
+    
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        print(f"Base seed: {seed}")
     
     # Run simulations for specified iteration range
-    for iteration in range(start, end):
-        # Run simulation (with or without media)
-        if N != 0:
-            sm, md = sim(s, N, eta)
-        else:
-            sm, md = sim(0, 1, eta, include_media=False)
-        
-        # Save opinion evolution data
-        opinions = pd.DataFrame(sm.Opinions_db)
-        opinions.to_parquet(f"{cwd}/opinions/{str(iteration)}_opinions.parquet")
-        
-        # Save message data
-        messages = sm.Message_db
-        messages.original_poster = messages.original_poster.astype(str)
-        messages.rt_poster = messages.rt_poster.astype(str)
-        messages.to_parquet(f"{cwd}/messages/{str(iteration)}_messages.parquet")
-        
-        # Save network evolution data
-        with open(f"{cwd}/networks/{str(iteration)}_networks.json", "w") as f:
-            js.dump(sm.Network_db, f) 
-        
-        # Save media effects data
-        effects = sm.ME_db 
-        effects.to_parquet(f"{cwd}/effects/{str(iteration)}_effects.parquet")
-        
-        # Save additional data for media simulations
-        if N != 0:
-            # Save user screen sizes
-            with open(f"{cwd}/screensizes/{str(iteration)}_screensizes.json", "w") as f:
-                js.dump([int(x) for x in sm.l], f)
-            
-            # Save subscription data
-            with open(f"{cwd}/subscriptions/{str(iteration)}_subscriptions.json", "w") as f:
-                js.dump(md.Subs_db, f)
+    iterations = [iteration for iteration in range(start, end)
+                  if not (resume and _done(N, iteration, cwd))]
+    failed = []
+    if workers == 1:
+        for iteration in iterations:
+            try:
+                run_iteration(s, N, eta, iteration, cwd, seed, resume, checkpoint_seconds)
+            except Exception:
+                traceback.print_exc()
+                failed.append(iteration)
+    else:
+        pending, rounds = iterations, 0
+        while pending:
+            broken = []
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Resubmitted iterations continue from their checkpoints
+                futures = {pool.submit(run_iteration, s, N, eta, iteration, cwd, seed,
+                                       resume or rounds > 0, checkpoint_seconds): iteration
+                           for iteration in pending}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except BrokenProcessPool:
+                        broken.append(futures[future])
+                    except Exception:
+                        print(f"Iteration {futures[future]} failed:", file=sys.stderr)
+                        traceback.print_exc()
+                        failed.append(futures[future])
+            rounds += 1
+            pending = sorted(broken)
+            if pending and rounds > restarts:
+                print(f"Worker pool broke {rounds} times; giving up on iterations {pending}",
+                      file=sys.stderr)
+                failed += pending
+                pending = []
+            elif pending:
+                print(f"A worker process died; restarting iterations {pending}", file=sys.stderr)
+    return sorted(failed)
 
 if __name__ == '__main__':
     # Command-line interface for batch simulation execution
@@ -102,6 +213,8 @@ Examples:
     python run.py 0.5 3 0.4 0 100    # 100 iterations with s=0.5, N=3, eta=0.4
     python run.py 0.7 1 0.3 0 50     # 50 iterations with different parameters
     python run.py 0 0 1.0 0 10       # Baseline simulation (no media)
+    python run.py 0.5 3 0.4 0 100 --workers 64 --seed 1  # Parallel, reproducible
+    python run.py 0.5 3 0.4 0 100 --workers 64 --seed 1 --resume  # Continue a killed batch
         """
     )
 
@@ -116,6 +229,14 @@ Examples:
                        help='Starting iteration number')
     parser.add_argument('end', type=int, 
                        help='Ending iteration number (exclusive)')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='Number of worker processes (default: 1)')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Base seed of the batch (default: fresh entropy)')
+    parser.add_argument('--resume', action='store_true',
+                       help='Skip finished iterations and resume the others from checkpoints')
+    parser.add_argument('--checkpoint-seconds', type=float, default=600,
+                       help='Seconds between checkpoints (default: 600)')
 
     # Parse arguments and run
     args = parser.parse_args()
@@ -126,5 +247,12 @@ Examples:
     print(f"  Tolerance (eta): {args.eta}")
     print(f"  Iterations: {args.start} to {args.end-1} ({args.end-args.start} total)")
     
-    run(args.s, args.N, args.eta, args.start, args.end)
+    print(f"  Workers: {args.workers}")
+    
+    failed = run(args.s, args.N, args.eta, args.start, args.end,
+                 workers=args.workers, seed=args.seed, resume=args.resume,
+                 checkpoint_seconds=args.checkpoint_seconds)
+    if failed:
+        print(f"Batch simulation completed with failed iterations: {failed}")
+        sys.exit(1)
     print("Batch simulation completed.")
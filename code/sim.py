@@ -17,11 +17,14 @@ References:
 
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import numpy as np#, pandas as pd, json as js
+import time
 from SocialMedia import SocialMedia
 from Media import MassMedia
 from tqdm import tqdm
 from activity import send_media_message, sample_user, user_activity, update_network
+from Recorder import HistoryRecorder
+from RandomPool import default_pool
+from checkpoint import save_checkpoint, load_checkpoint
 import argparse
           
 def sim(s, N, eta,
@@ -29,11 +32,19 @@ def sim(s, N, eta,
         mix = False, 
         include_media = True,
         effect_record = True, 
+        media_effects_only = False,
         n = 100, m = 400, 
+        graph = "array",
         T = 10000, 
         miu = .3, 
         prob_rewire = .3, 
-        rand =.2):  #rand,
+        rand =.2,
+        recorders = None,
+        seed = None,
+        checkpoint = None,
+        checkpoint_every = None,
+        checkpoint_seconds = 600,
+        resume = False):  #rand,
     """Run agent-based simulation of media effects on opinion dynamics.
     
     This function simulates opinion formation and evolution in a social network
@@ -51,13 +62,34 @@ def sim(s, N, eta,
                              Defaults to False.
         include_media (bool, optional): Include mass media in simulation. Defaults to True.
         effect_record (bool, optional): Record media effects data. Defaults to True.
+        media_effects_only (bool, optional): Only record effects of messages originally
+                                            posted by media. Defaults to False.
         n (int, optional): Number of users/agents in the network. Defaults to 100.
         m (int, optional): Number of edges in the initial network. Defaults to 400.
+        graph (str, optional): Network backend of the platform, 'array' or 'networkx'.
+                               Defaults to 'array'.
         T (int, optional): Number of time steps to simulate. Defaults to 10000.
         miu (float, optional): Strength of social influence (0-1). Defaults to 0.3.
         prob_rewire (float, optional): Probability of network rewiring at each step.
                                       Defaults to 0.3.
         rand (float, optional): Noise level in opinion updates. Defaults to 0.2.
+        recorders (list, optional): Recorder instances receiving every step's
+                                    outcome. Defaults to a single HistoryRecorder
+                                    filling the in-memory histories.
+        seed (int, SeedSequence, Generator or RandomPool, optional): Seed of the
+                                    run's random stream, which every component
+                                    draws from. Defaults to fresh entropy.
+        checkpoint (str, optional): File to save the full simulation state to
+                                    periodically. Defaults to None (no
+                                    checkpoints).
+        checkpoint_every (int, optional): Time steps between checkpoints.
+                                          Defaults to None (by time only).
+        checkpoint_seconds (float, optional): Wall-clock seconds between
+                                              checkpoints. Defaults to 600.
+        resume (bool, optional): Continue from the checkpoint file if it exists,
+                                 with the recorders stored in it. The other
+                                 parameters must match the checkpointed run,
+                                 except T. Defaults to False.
     
     Returns:
         tuple: A tuple containing:
@@ -74,17 +106,31 @@ def sim(s, N, eta,
         >>> # Get opinion evolution over time
         >>> opinion_history = social_media.Opinions_db
     """
-    # Initialize social media platform and mass media systems
-    sm = SocialMedia(n= n, m = m) 
-    md = MassMedia(p, s, N)
+    params = dict(s=s, N=N, eta=eta, p=p, mix=mix, include_media=include_media,
+                  n=n, m=m, graph=graph, miu=miu, prob_rewire=prob_rewire, rand=rand)
     
-    # Main simulation loop
-    for t in np.arange(T):#tqdm(np.arange(T), desc = "Run: "): #np.arange(T):
-        # Get current opinion state
-        Os = sm.Opinions_db[list(sm.Opinions_db.keys())[-1]]
+    if resume and checkpoint is not None and os.path.exists(checkpoint):
+        # Continue a previous run from its last checkpoint
+        start, sm, md, recorders = load_checkpoint(checkpoint, params)
+    else:
+        # Initialize social media platform and mass media systems
+        rng = default_pool(seed)
+        sm = SocialMedia(n= n, m = m, graph = graph, rng = rng) 
+        md = MassMedia(p, s, N, agents = n, O = sm.opinions(), rng = rng)
         
+        if recorders is None:
+            recorders = [HistoryRecorder(effect_record=effect_record,
+                                         media_effects_only=media_effects_only)]
+        for recorder in recorders:
+            recorder.start(sm, md)
+        start = 0
+    
+    saved = time.monotonic()  # Time of the last checkpoint
+    
+    # Main simulation loop
+    for t in range(start, T):#tqdm(np.arange(T), desc = "Run: "): #np.arange(T):
         # Mass media posts messages based on audience opinions
-        send_media_message(sm, md, Os, include_media)
+        send_media_message(sm, md, include_media)
         
         # Sample a random user for this time step
         uid, l = sample_user(sm)
@@ -98,19 +144,35 @@ def sim(s, N, eta,
             # Record user's new message
             sm.add_message(new_post)
             
-            # Update user's opinion in the database
-            sm.update_Opinions_db(uid, new_o, t)
-            
-            # Record media effects if tracking is enabled
-            if effect_record == True:
-                sm.update_ME_db(t, uid, fri, foe)
+            # Update user's opinion and the audience opinions of their media
+            old_o = sm.get_recent_o(uid)
+            sm.update_opinion(uid, new_o)
+            md.update_audience(uid, old_o)
             
             # Update network structure based on opinion similarity
             update_network(user, prob_rewire, fri, foe, md, sm, mix = mix)
             
-            # Record network and subscription changes
-            sm.update_Network_db(t)
-            md.update_Sub_DB(t)
+            # Record opinion, effect, network and subscription changes
+            for recorder in recorders:
+                recorder.record(t, sm, md, uid, new_o, fri, foe)
+            sm.edge_changes.clear()
+            md.sub_changes.clear()
+            
+            # Drop messages saved by every recorder that are out of reach
+            sm.messages.release(min((recorder.saved_messages(sm) for recorder in recorders), default=0))
+        
+        # Save the full state so that a killed run can be resumed
+        if checkpoint is not None and t + 1 < T and (
+                (checkpoint_every is not None and (t + 1) % checkpoint_every == 0)
+                or time.monotonic() - saved >= checkpoint_seconds):
+            for recorder in recorders:
+                recorder.checkpoint(sm, md)
+            sm.messages.release(min((recorder.saved_messages(sm) for recorder in recorders), default=0))
+            save_checkpoint(checkpoint, t + 1, params, sm, md, recorders)
+            saved = time.monotonic()
+    
+    for recorder in recorders:
+        recorder.finish(sm, md)
             
     return sm, md
 
@@ -128,12 +190,19 @@ if __name__ == '__main__':
     parser.add_argument('--mix', action='store_true', help='Allow cross-cutting exposure')
     parser.add_argument('--no-media', dest='include_media', action='store_false', help='Exclude include_media parameter')
     parser.add_argument('--no-effect', dest='effect_record', action='store_false', help='Exclude effect_record parameter')
+    parser.add_argument('--media-effects-only', action='store_true', help='Record only effects of media messages')
     parser.add_argument('--n', type=int, default=100, help='Number of nodes')
     parser.add_argument('--m', type=int, default=400, help='Number of links')
+    parser.add_argument('--graph', default='array', choices=['array', 'networkx'], help='Network backend')
     parser.add_argument('--T', type=int, default=10000, help='Time steps')
     parser.add_argument('--miu', type=float, default=.3, help='Social influence magnitutde')
     parser.add_argument('--prob-rewire', type=float, default=.3, help='Probability to rewire')
     parser.add_argument('--rand', type=float, default=.2, help='Noise level')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--checkpoint', default=None, help='Checkpoint file')
+    parser.add_argument('--checkpoint-every', type=int, default=None, help='Time steps between checkpoints')
+    parser.add_argument('--checkpoint-seconds', type=float, default=600, help='Seconds between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='Resume from the checkpoint file')
 
     # Parse the command-line arguments
     args = parser.parse_args()
@@ -142,11 +211,18 @@ if __name__ == '__main__':
         mix=args.mix, 
         include_media=args.include_media, 
         effect_record=args.effect_record, 
+        media_effects_only=args.media_effects_only,
         n=args.n, m=args.m, 
+        graph=args.graph,
         T=args.T, 
         miu=args.miu, 
         prob_rewire=args.prob_rewire, 
-        rand=args.rand)
+        rand=args.rand,
+        seed=args.seed,
+        checkpoint=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
+        checkpoint_seconds=args.checkpoint_seconds,
+        resume=args.resume)
 
-    #python sim.py <value for s> <value for N> <value for eta> --p <value for p> --mix --no-media --no-effect --n <value for n> --m <value for m> --T <value for T> --miu <value for miu> --prob-rewire <value for prob_rewire> --rand <value for rand>
+    #python sim.py <value for s> <value for N> <value for eta> --p <value for p> --mix --no-media --no-effect --media-effects-only --n <value for n> --m <value for m> --T <value for T> --miu <value for miu> --prob-rewire <value for prob_rewire> --rand <value for rand> --seed <value for seed> --checkpoint <file> --checkpoint-every <steps> --checkpoint-seconds <seconds> --resume
 
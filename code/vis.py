@@ -10,6 +10,7 @@ Functions:
 import os
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
 import matplotlib.pyplot as plt, seaborn as sns, pandas as pd
+from History import OpinionHistory
 
 def vis(sm, s, N, eta):
     """Create comprehensive visualization dashboard for simulation results.
@@ -21,7 +22,8 @@ def vis(sm, s, N, eta):
     4. Final opinion distribution histogram
     
     Args:
-        sm (SocialMedia): Social media simulation results
+        sm (SocialMedia or OpinionHistory): Simulation results, or an opinion
+                                            history loaded from disk
         s (float): Audience share parameter
         N (int): Number of media systems
         eta (float): Tolerance threshold
@@ -39,8 +41,10 @@ def vis(sm, s, N, eta):
     fig, axes = plt.subplots(2, 2, figsize=(10, 10))
     axes = axes.flatten()
     
-    # Convert opinion database to DataFrame
-    data = pd.DataFrame(sm.Opinions_db)
+    # Materialize the opinion history as an (agent x time) DataFrame
+    history = sm if isinstance(sm, OpinionHistory) else sm.Opinions_db
+    M = history.matrix()
+    data = pd.DataFrame(M.T, columns=[f"Time_{t}" for t in range(len(M))])
     
     # Plot 1: Opinion evolution over time
     data.T.plot(figsize=(20, 10), ax=axes[0])
@@ -1,18 +1,26 @@
-import os
+import os, sys
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
 import numpy as np
 import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+from History import load_opinions
+from ids import is_media
 
 def ind_diff_one(folder, iteration):
-    op = pd.read_parquet(f"{folder}/opinions/{str(iteration)}_opinions.parquet")
-    start = op[op.columns[0]]
-    end = op[op.columns[-1]]
-    diff = np.abs(end - start)
+    op = load_opinions(f"{folder}/opinions/{str(iteration)}_opinions.parquet")
+    start = op.at(0)
+    end = op.latest()
+    diff = pd.Series(np.abs(end - start))
     ms = pd.read_parquet(f"{folder}/messages/{str(iteration)}_messages.parquet")
+    if "n" in ms.attrs:
+        ms["media"] = is_media(ms.original_poster, ms.attrs["n"])
+    else:
+        # Legacy exports label media posters "m{k}"
+        ms["media"] = ms.original_poster.str.contains("m")
     ef = pd.read_parquet(f"{folder}/effects/{str(iteration)}_effects.parquet")
     history = pd.merge(ms.reset_index(), ef, on = "index", how = "right")
-    history["med_exp"] = history.original_poster.str.contains("m")
-    history["med_eff"] = history.original_poster.str.contains("m") & history.effects == True
+    history["med_exp"] = history.media
+    history["med_eff"] = history.media & history.effects == True
     exp = pd.DataFrame(history.groupby("uid").med_exp.value_counts(normalize= False).loc[slice(None), True])
     eff = pd.DataFrame(history.groupby("uid").med_eff.value_counts(normalize= False).loc[slice(None), True])
     res = pd.concat([diff, exp, eff], axis = 1).dropna().corr()[0].values[1:]
@@ -1,8 +1,9 @@
-import os
+import os, sys
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
-import numpy as np
 import pandas as pd
-from entropy_continuous import entropy_continuous
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+from History import OpinionHistory
+from Entropy import entropy_series, entropy_matrix
 
 
 #ROOT_DIR = "/N/slate/harryan/sim_data/"
@@ -13,10 +14,14 @@ def entropies_folder(folder, iterations =100):
     for iteration in range(iterations):
         f_dir = f"{folder}/opinions/{str(iteration)}_opinions.parquet"
         #print(f_dir)
-        op = pd.read_parquet(f_dir)
-        entropy_one_iter = op.apply(entropy_continuous, axis = 0)
-        one_iter_reindex = entropy_one_iter.reindex(time_index, fill_value= np.nan)
-        one_iter_fillna = one_iter_reindex.fillna((one_iter_reindex.ffill() + one_iter_reindex.bfill()) / 2)
-        entropies.append(one_iter_fillna)
+        df = pd.read_parquet(f_dir)
+        if list(df.columns) == ["t", "uid", "value"]:
+            # Entropy updated per opinion change; steps without a change are carried forward
+            entropy_one_iter = entropy_series(OpinionHistory.from_frame(df), stop = len(time_index))
+        else:
+            # Legacy wide archive (agent x Time_t): bin all time steps at once
+            M = df.reindex(columns = time_index).ffill(axis = 1).to_numpy().T
+            entropy_one_iter = entropy_matrix(M)
+        entropies.append(pd.Series(entropy_one_iter, index = time_index))
     entropies_df = pd.concat(entropies, axis = 1)
     return entropies_df
@@ -1,26 +1,24 @@
-import os
+import os, sys
 os.environ['OPENBLAS_NUM_THREADS'] = '1'
 import numpy as np
 import pandas as pd
-import networkx as nx
-import json as js
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "code"))
+from History import load_networks
+from Components import component_counts
 
 def n_cpnts_folder(folder, iterations =100):
     time_index = [f"Time_{str(i)}" for i in range(10000)]
     n_folder =[]
     for iteration in range(iterations):
-        f_dir = f"{folder}/networks/{str(iteration)}_networks.json"
+        f_dir = f"{folder}/networks/{str(iteration)}_networks"
         #print(f_dir)
-        with open(f_dir, 'r') as f:
-            networks =  js.load(f)
-        n_iter = {}
-        for timestep, edgelist in networks.items():
-            g_t = nx.from_edgelist(edgelist, create_using= nx.Graph)
-            n_t = nx.number_connected_components(g_t)
-            n_iter[timestep] = n_t
-        n_iter = pd.Series(n_iter)
+        # Edge-event Parquet, or a legacy JSON file of per-step edge lists
+        path = f_dir + ".parquet" if os.path.exists(f_dir + ".parquet") else f_dir + ".json"
+        # Component counts updated per edge event while replaying the history
+        counts = component_counts(load_networks(path))
+        n_iter = pd.Series(counts, index = [f"Time_{t}" for t in range(len(counts))])
         n_iter = n_iter.reindex(time_index, fill_value= np.nan)
         n_iter = n_iter.fillna(n_iter.ffill())
         n_folder.append(n_iter)
     n_df = pd.concat(n_folder, axis = 1)
-    return n_df
\ No newline at end of file
+    return n_df
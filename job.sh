@@ -25,4 +25,4 @@ st=$4
 en=$5
 
 
-srun --exclusive python run.py $s $N $e $st $en
\ No newline at end of file
+srun --exclusive python run.py $s $N $e $st $en --workers ${SLURM_CPUS_PER_TASK:-1}
\ No newline at end of file